@@ -0,0 +1,57 @@
+"""
+Checkpoints of the state of QuantifierElimination on disk.
+
+A checkpoint is a gzip-compressed pickle of a dict. Formulas in it are packed
+with util.pack, so that they do not depend on how logic1 pickles formulas.
+Writes are atomic: the checkpoint is written to a temporary file next to the
+target, which then replaces the target. A crash during a write thus leaves
+the previous checkpoint intact. Once a run is complete, its checkpoint is
+discarded.
+
+>>> import os, tempfile
+>>> path = os.path.join(tempfile.mkdtemp(), "qe.ckpt")
+>>> save(path, {"pool": [([1], 2)]})
+>>> load(path)
+{'pool': [([1], 2)], 'version': 2}
+>>> discard(path)
+>>> os.path.exists(path)
+False
+"""
+
+import gzip
+import os
+import pickle
+import tempfile
+from typing import Any
+
+VERSION = 2
+
+
+def save(path: str, state: dict[str, Any]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    (fd, tmp) = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                pickle.dump(dict(state, version=VERSION), f, protocol=pickle.HIGHEST_PROTOCOL)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load(path: str) -> dict[str, Any]:
+    with gzip.open(path, "rb") as f:
+        state = pickle.load(f)
+    if state.get("version") != VERSION:
+        raise ValueError("unsupported checkpoint version " + repr(state.get("version")))
+    return state
+
+
+def discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,76 @@
+"""
+Hash-consing of formulas.
+
+Interner.intern returns one canonical node for all structurally equal
+formulas, and id numbers the canonical nodes. The interner keeps canonical
+nodes alive, so they can be recognized by object identity. Interned formulas
+are equal iff they are identical. Their ids can be used in place of deep
+hashing, since looking them up is a dict lookup on id(). Subformulas are
+interned first, so a node is found by its class and the ids of its
+arguments, without hashing the whole tree. Since canonical nodes are kept
+until clear, owners clear the interner once they are done with a batch of
+formulas, see Simplifier.scope and QuantifierElimination.scope.
+
+>>> from logic1.atomlib.sympy import Eq
+>>> from logic1.firstorder.boolean import And
+>>> from sympy.abc import x, y
+>>> interner = Interner()
+>>> φ = interner.intern(And(Eq(x, 0), Eq(y, 0)))
+>>> ψ = interner.intern(And(Eq(x, 0), Eq(y, 0)))
+>>> φ is ψ
+True
+>>> interner.id(φ.args[0]) == interner.id(Eq(x, 0))
+True
+"""
+
+from typing import Any, Hashable
+
+from logic1.firstorder import AtomicFormula
+from logic1.firstorder.formula import Formula
+from logic1.firstorder.quantified import QuantifiedFormula
+from logic1.firstorder.truth import TruthValue
+
+
+class Interner:
+    def __init__(self) -> None:
+        # Canonical nodes by their keys, see intern.
+        self.nodes: dict[Hashable, Formula] = {}
+        # Ids of canonical nodes by their id(). Ids are never reused, even
+        # after clear, so that ids stored elsewhere do not become ambiguous.
+        self.ids: dict[int, int] = {}
+        self.next = 0
+
+    def intern(self, φ: Formula) -> Formula:
+        if id(φ) in self.ids:
+            return φ
+        if isinstance(φ, TruthValue):
+            (key, make) = (φ, lambda: φ)
+        elif isinstance(φ, AtomicFormula):
+            (key, make) = ((φ.func, φ.args), lambda: φ)
+        elif isinstance(φ, QuantifiedFormula):
+            arg = self.intern(φ.arg)
+            key = (φ.func, φ.var, self.ids[id(arg)])
+            make = (lambda: φ) if arg is φ.arg else (lambda: φ.func(φ.var, arg))
+        else:
+            args = tuple(self.intern(ψ) for ψ in φ.args)
+            key = (φ.func, tuple(self.ids[id(ψ)] for ψ in args))
+            same = all(a is b for (a, b) in zip(args, φ.args))
+            make = (lambda: φ) if same else (lambda: φ.func(*args))
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = make()
+            self.ids[id(node)] = self.next
+            self.next += 1
+        return node
+
+    def id(self, φ: Formula) -> int:
+        return self.ids[id(self.intern(φ))]
+
+    def clear(self) -> None:
+        self.nodes.clear()
+        self.ids.clear()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Keys of self.ids are addresses, which are meaningless in another
+        # process, so copies start empty. Ids continue to be fresh.
+        return {"nodes": {}, "ids": {}, "next": self.next}
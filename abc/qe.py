@@ -1,16 +1,26 @@
 from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import copy
+import heapq
+from contextlib import contextmanager, nullcontext
 import logging
+import multiprocessing
+import os
 from abc import ABC, abstractmethod
-from time import time
-from typing import Callable, Generic, Optional, TypeVar
+from time import perf_counter
+from typing import Any, Callable, Generic, Iterable, Iterator, Optional, TypeVar
 
 from logic1.firstorder import AtomicFormula, BooleanFormula
-from logic1.firstorder.boolean import And, Not, Or
+from logic1.firstorder.boolean import And, AndOr, Not, Or
 from logic1.firstorder.formula import Formula
 from logic1.firstorder.quantified import All, QuantifiedFormula
 from logic1.firstorder.truth import F, T
 
-from ..util import conjunctive_core, matrix, var_occs, blocks
+from ..util import Memo, atoms, conjunctive_core, disjuncts, matrix, miniscope, pack, size, unpack, var_occs, blocks
+from . import checkpoint
+from .intern import Interner
+from .stats import Stats
+from .trace import CollectFinished, PopBlock, ProcessPool, Setup, Step, Tracer
 
 α = TypeVar("α")
 
@@ -19,12 +29,133 @@ Matrix = BooleanFormula | AtomicFormula
 logger = logging.getLogger("qe")
 logger.propagate = False
 streamHandler = logging.StreamHandler()
-streamHandler.setFormatter(
-    logging.Formatter("%(levelname)s[%(relativeCreated)0.0f ms]: %(message)s")
-)
+streamHandler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
 logger.addHandler(streamHandler)
 
 
+class Pool(Generic[α]):
+    """
+    The jobs of QuantifierElimination as a priority queue. pop() returns a
+    job (variables, f) of least key(variables, f). Among jobs with equal keys
+    the one appended last comes first, so that with a constant key this is a
+    stack.
+    """
+
+    def __init__(self, key: Callable[[list[α], Matrix], Any], jobs: Iterable[tuple[list[α], Matrix]] = ()) -> None:
+        self.key = key
+        self.heap: list[tuple[Any, int, list[α], Matrix]] = []
+        self.count = 0
+        self.extend(jobs)
+
+    def append(self, job: tuple[list[α], Matrix]) -> None:
+        (variables, f) = job
+        self.count += 1
+        heapq.heappush(self.heap, (self.key(variables, f), -self.count, variables, f))
+
+    def extend(self, jobs: Iterable[tuple[list[α], Matrix]]) -> None:
+        for job in jobs:
+            self.append(job)
+
+    def pop(self) -> tuple[list[α], Matrix]:
+        (_, _, variables, f) = heapq.heappop(self.heap)
+        return (variables, f)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __iter__(self) -> Iterator[tuple[list[α], Matrix]]:
+        return ((variables, f) for (_, _, variables, f) in sorted(self.heap))
+
+    def __repr__(self) -> str:
+        return f"Pool({list(self)!r})"
+
+
+class Cursor(Generic[α]):
+    """
+    Generates the disjuncts of a DNF of f for the job with the given
+    variables lazily, see util.disjuncts. The number of disjuncts consumed
+    is counted, so that a cursor can be saved as (variables, f, consumed) and
+    recreated where it left off.
+
+    >>> from logic1.atomlib.sympy import Eq
+    >>> from sympy.abc import x
+    >>> cursor = Cursor([x], Or(Eq(x, 0), Eq(x, 1), Eq(x, 2)))
+    >>> next(cursor)
+    [Eq(x, 0)]
+    >>> next(Cursor(cursor.variables, cursor.f, cursor.consumed))
+    [Eq(x, 1)]
+    """
+
+    def __init__(self, variables: list[α], f: Matrix, consumed: int = 0) -> None:
+        self.variables = variables
+        self.f = f
+        self.consumed = consumed
+        self.disjuncts = disjuncts(f.to_nnf())
+        for _ in range(consumed):
+            next(self.disjuncts, None)
+
+    def __iter__(self) -> Iterator[list[Formula]]:
+        return self
+
+    def __next__(self) -> list[Formula]:
+        literals = next(self.disjuncts)
+        self.consumed += 1
+        return literals
+
+
+class Finished:
+    """
+    The finished formulas of QuantifierElimination, read as a disjunction.
+
+    Each formula is indexed by the set of its conjuncts, as a bitset over
+    interned conjuncts. A formula whose set of conjuncts contains that of
+    another formula implies it and is thus redundant. Such formulas are
+    dropped when added, or evicted when the smaller formula comes later.
+
+    >>> from logic1.atomlib.sympy import Eq
+    >>> from sympy.abc import x, y
+    >>> finished = Finished(Interner(), [And(Eq(x, 0), Eq(y, 0)), Eq(y, 1)])
+    >>> finished.append(And(Eq(y, 1), Eq(x, 1)))
+    >>> finished.append(Eq(x, 0))
+    >>> list(finished) == [Eq(y, 1), Eq(x, 0)]
+    True
+    """
+
+    def __init__(self, interner: Interner, formulas: Iterable[Formula] = ()) -> None:
+        self.interner = interner
+        # Bit positions of conjuncts by their interned ids.
+        self.ids: dict[int, int] = {}
+        self.entries: dict[int, Formula] = {}
+        self.extend(formulas)
+
+    def append(self, f: Formula) -> None:
+        if f is F:
+            return
+        # T is the empty conjunction, which subsumes everything.
+        conjuncts = () if f is T else f.args if isinstance(f, And) else (f,)
+        bits = 0
+        for a in conjuncts:
+            bits |= 1 << self.ids.setdefault(self.interner.id(a), len(self.ids))
+        if any(b & bits == b for b in self.entries):
+            return
+        for b in [b for b in self.entries if b & bits == bits]:
+            del self.entries[b]
+        self.entries[bits] = f
+
+    def extend(self, formulas: Iterable[Formula]) -> None:
+        for f in formulas:
+            self.append(f)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Formula]:
+        return iter(self.entries.values())
+
+    def __repr__(self) -> str:
+        return f"Finished({list(self)!r})"
+
+
 class QuantifierElimination(ABC, Generic[α]):
     def __init__(
         self,
@@ -34,10 +165,25 @@ class QuantifierElimination(ABC, Generic[α]):
         negated=None,
         pool=None,
         finished=None,
+        reduce: Optional[Callable[[Formula], Formula]] = None,
+        workers: Optional[int] = None,
+        context: Optional[str] = None,
+        memo: int = 1024,
+        lazy: bool = False,
+        miniscope: bool = False,
+        stats: bool = False,
+        checkpoint: Optional[str] = None,
+        interval: float = 60.0,
     ) -> None:
         #  __init__ is typically called without arguments so that everything is
         #  initialized with None.
 
+        # self.interner interns formulas so that they can be compared and
+        # hashed by their ids, see abc/intern.py. It is shared with simplify
+        # if that has an interner, so that simplified formulas are interned
+        # already.
+        self.interner: Interner = getattr(simplify, "interner", None) or Interner()
+
         # A quantifier block is a pair (quantifier Symbol, list of variables).
         # self.blocks holds a list of quantifier Blocks.
         self.blocks: Optional[list[tuple[type[QuantifiedFormula], list[α]]]] = blocks
@@ -48,64 +194,216 @@ class QuantifierElimination(ABC, Generic[α]):
         # self.blocks and self.matrix will be initialized with the PNF of the
         # input formula later on. Then elimination proceeds block-wise.
 
+        # If self.miniscope is set, qe first pushes quantifiers inward, see
+        # util.miniscope, and then eliminates each quantified subformula on
+        # its own, innermost first.
+        self.miniscope: bool = miniscope
+
         # self.negated is bool. It is T when the list of primitive formulas
         # processed in self.pool below, originates from an All-block.
         self.negated: Optional[bool] = negated
 
-        # self.pool is a Pool (subclass of list, s.a.) of pairs (list of
+        # self.pool is a Pool (s.a.) of pairs (list of
         # variables, conjunction of literals). Each pair represents a primitive
         # formula, which establishes a subproblem that we call "job".
-        self.pool: Optional[list[tuple[list[α], Matrix]]] = pool
+        # Jobs are ordered by self.estimate.
+        self.pool: Optional[Pool[α]] = Pool(self.estimate, pool) if pool is not None else None
+
+        # finished is a Finished (s.a.) of quantifier free formulas. Those are
+        # subproblems from self.pool where all variables have been eliminated.
+        self.finished: Optional[Finished] = Finished(self.interner, finished) if finished is not None else None
 
-        # finished is a list of quantifier free formulas. Those are subproblems
-        # from self.pool where all variables have been eliminated.
-        self.finished: Optional[list[Formula]] = finished
+        # If self.lazy is set, push_to_pool does not compute the DNF but
+        # pushes a cursor to self.cursors, which generates disjuncts on demand,
+        # see next_job.
+        self.lazy: bool = lazy
+        self.cursors: list[Cursor[α]] = []
 
         self.simplify: Callable[[Formula], Formula] = simplify
 
+        # self.reduce is an optional, typically more expensive, stage that
+        # process_pool applies after simplify to the result of each
+        # elimination step, e.g. to remove redundant atoms.
+        self.reduce: Optional[Callable[[Formula], Formula]] = reduce
+
+        # If self.workers is not None, process_pool runs jobs in a pool of
+        # that many worker processes, or one per core if it is 0.
+        self.workers: Optional[int] = workers
+
+        # self.context is the start method of the worker processes, e.g.
+        # "fork" or "spawn", see multiprocessing.get_context. None means the
+        # default of the platform.
+        self.context: Optional[str] = context
+
+        # self.memo caches results of qe1p, keyed on the variable and the set
+        # of atoms of the conjunction, which simplify has put into normal
+        # form. memo is the number of entries kept, 0 disables caching.
+        # Theories whose qe1p depends on mutable state must clear self.memo
+        # when that state changes.
+        self.memo: Memo[Matrix] = Memo(memo)
+
+        # self.tracer receives an event after each step, see abc/trace.py.
+        # Subscribe to it to observe the elimination.
+        self.tracer = Tracer(logger)
+
+        # If stats is set, self.stats holds the Stats of the last call of qe
+        # or resume, see abc/stats.py. In parallel mode, the jobs that
+        # workers push are counted, but the counters of the steps they run,
+        # e.g. qe1p calls and times, are not included.
+        self.stats: Optional[Stats] = Stats() if stats else None
+
+        # If self.checkpoint is a path, the state of the elimination is saved
+        # there while processing the pool, at most every self.interval
+        # seconds, see save. resume continues from such a checkpoint.
+        self.checkpoint: Optional[str] = checkpoint
+        self.interval: float = interval
+        self.saved = perf_counter()
+
+        # In worker processes, self.cancel is set by the coordinator as soon
+        # as some job is equivalent to T. process_job then gives up.
+        self.cancel: Optional[Any] = None
+
     def push_to_pool(self, vars_: list[α], f: Matrix) -> Optional[tuple[()]]:
         if self.pool is None:
-            self.pool = []
+            self.pool = Pool(self.estimate)
+
+        if self.lazy:
+            self.cursors.append(Cursor(vars_, f))
+            return None
 
         dnf = f.to_dnf()
 
         if isinstance(dnf, And | AtomicFormula):
             self.pool.append((vars_, dnf))
+            self.count_jobs(1)
         elif dnf is F:
             return
         elif dnf is T:
             return ()
         elif isinstance(dnf, Or):
             self.pool.extend([(vars_.copy(), f) for f in dnf.args])  # type: ignore
+            self.count_jobs(len(dnf.args))
         else:
             raise NotImplementedError(
                 "dnf is strange: " + str(dnf) + " " + str(type(dnf))
             )
 
+    def count_jobs(self, n: int) -> None:
+        if self.stats is not None:
+            assert self.pool is not None
+            self.stats.jobs += n
+            self.stats.peak_pool = max(self.stats.peak_pool, len(self.pool))
+
     def true(self):
         self.pool = None
-        self.finished = [T]
+        self.cursors = []
+        self.finished = Finished(self.interner, [T])
 
     def __call__(self, f):
         return self.qe(f)
 
     def qe(self, f: Formula) -> Formula:
-        f = self.simplify(f)
-        logging._startTime = time()  # type: ignore
+        if self.miniscope and self.checkpoint is not None:
+            raise ValueError("checkpoints cannot be combined with miniscope")
+        with self.scope():
+            f = self.simplify(f)
+            if self.miniscope:
+                f = self.scoped(miniscope(f.to_nnf()))
+            return self.eliminate(f)
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        # Runs one call of qe or resume. Interned formulas, and the caches
+        # keyed on their ids, are kept for the run and released afterwards,
+        # see clear. simplify keeps its own caches for the run, too, if it
+        # supports that. Tracing and stats start over with each run.
+        scope = getattr(self.simplify, "scope", None)
+        with scope() if scope is not None else nullcontext():
+            self.tracer.start()
+            self.saved = perf_counter()
+            if self.stats is not None:
+                self.stats = Stats()
+                caches = self.caches()
+            try:
+                yield
+            finally:
+                if self.stats is not None:
+                    for (name, (hits, misses)) in self.caches().items():
+                        (h, m) = caches.get(name, (0, 0))
+                        self.stats.caches[name] = (hits - h, misses - m)
+                self.clear()
+
+    def clear(self) -> None:
+        # Theories that cache by interned ids extend this.
+        self.interner.clear()
+        self.memo.clear()
+
+    def scoped(self, f: Formula) -> Formula:
+        # Eliminates the quantifiers of f bottom-up, running the elimination
+        # on each quantified subformula separately. Directly nested
+        # quantifiers of the same kind are kept together as one block.
+        if isinstance(f, QuantifiedFormula):
+            (q, xs, g) = (f.func, [], f)
+            while isinstance(g, q):
+                xs.append(g.var)
+                g = g.arg
+            g = self.scoped(g)
+            for x in reversed(xs):
+                g = q(x, g)
+            return self.eliminate(self.simplify(g))
+        elif isinstance(f, AndOr):
+            return self.simplify(f.func(*map(self.scoped, f.args)))
+        else:
+            return f
+
+    def eliminate(self, f: Formula) -> Formula:
         self.setup(f)
-        while self.blocks:
-            if self.pop_block() == ():
+        return self.run()
+
+    def resume(self, path: str) -> Formula:
+        # Continues the elimination from the checkpoint at path, which was
+        # saved by an instance of the same theory, and returns the result as
+        # qe does. During the call, checkpoints go on to be saved at path
+        # unless self.checkpoint is set otherwise. Once the elimination is
+        # complete, the checkpoint at path is removed, see run.
+        previous = self.checkpoint
+        with self.scope():
+            self.restore(checkpoint.load(path))
+            if self.checkpoint is None:
+                self.checkpoint = path
+            try:
+                f = self.run()
+            finally:
+                self.checkpoint = previous
+            checkpoint.discard(path)
+            return f
+
+    def run(self) -> Formula:
+        # Eliminates self.blocks from self.matrix. If self.pool is not None,
+        # the elimination of a block is in progress, and continues first.
+        in_block = self.pool is not None
+        while in_block or self.blocks:
+            start = perf_counter()
+            if not in_block and self.pop_block() == ():
                 self.true()
             elif self.process_pool() == ():
                 self.true()
             self.collect_finished()
+            in_block = False
+            if self.stats is not None:
+                self.stats.blocks.append(perf_counter() - start)
 
         assert self.matrix is not None
         f = self.simplify(self.simplify(self.matrix).to_dnf()).to_dnf()  # type: ignore
         self.matrix = None
+        # The checkpoint is not needed anymore, and is removed so that it is
+        # not mistaken for an interrupted run.
+        if self.checkpoint is not None:
+            checkpoint.discard(self.checkpoint)
         return f
 
     def setup(self, f: Formula) -> None:
+        start = perf_counter()
         f = f.to_pnf()
 
         if not self.blocks:
@@ -114,7 +412,8 @@ class QuantifierElimination(ABC, Generic[α]):
         if not self.matrix:
             self.matrix = matrix(f)
 
-        logger.info(f"{self.setup.__qualname__}: {self}")
+        if self.tracer:
+            self.tracer.emit(Setup(self, perf_counter() - start, blocks=len(self.blocks)))
 
     def pop_block(self) -> Optional[tuple[()]]:
         assert self.blocks is not None
@@ -124,6 +423,7 @@ class QuantifierElimination(ABC, Generic[α]):
         assert self.pool is None
         assert self.finished is None
 
+        start = perf_counter()
         (q, x) = self.blocks.pop()
         self.negated = q is All
 
@@ -134,54 +434,292 @@ class QuantifierElimination(ABC, Generic[α]):
             return ()
 
         self.matrix = None
-        self.finished = []
-        logger.info(f"{self.pop_block.__qualname__}: {self}")
+        self.finished = Finished(self.interner)
+        if self.tracer:
+            assert self.pool is not None
+            event = PopBlock(self, perf_counter() - start, quantifier=q.__name__, variables=len(x), jobs=len(self.pool))
+            self.tracer.emit(event)
 
     def process_pool(self) -> Optional[tuple[()]]:
         assert self.finished is not None
         assert self.pool is not None
-        while self.pool:
-            (variables, f) = self.pool.pop()
-            assert variables
-            counter = Counter(var_occs(f)).most_common()
-            x = next(filter(lambda x: x[0] in variables, reversed(counter)), (None, None))[0]
+        if self.workers is not None:
+            return self.process_pool_parallel()
+        start = perf_counter()
+        while (job := self.next_job()) is not None:
+            if self.process_job(*job) == ():
+                return ()
+            self.save_if_due()
+
+        if self.tracer:
+            self.tracer.emit(ProcessPool(self, perf_counter() - start, finished=len(self.finished)))
+        assert not self.pool and not self.cursors
+        return None
+
+    def next_job(self) -> Optional[tuple[list[α], Matrix]]:
+        # Pops the next job from self.pool or, if that is empty, takes the
+        # next disjunct from the last cursor. Disjuncts are simplified here,
+        # and dropped if they are F. Returns None if there are no jobs left.
+        assert self.pool is not None
+        if self.pool:
+            return self.pool.pop()
+        while self.cursors:
+            cursor = self.cursors[-1]
+            for literals in cursor:
+                f = self.simplify(And(*literals))
+                if f is not F:
+                    self.count_jobs(1)
+                    return (cursor.variables.copy(), f)
+            self.cursors.pop()
+        return None
+
+    def process_pool_parallel(self) -> Optional[tuple[()]]:
+        # Jobs are independent, so they are handed to worker processes as
+        # they come. Each worker runs process_job on a copy of self, see
+        # _initialize, and sends back what it pushed to its pool, to its
+        # cursors and to its finished list. Formulas are packed for the
+        # transport. In lazy mode, workers push cursors, which are sent back
+        # with their source formulas, so that disjuncts are generated here
+        # as they are needed.
+        #
+        # As soon as one job is equivalent to T, so is the whole pool. Then
+        # queued jobs are discarded, and the workers are terminated without
+        # waiting for the jobs they are running, see _terminate. Jobs that
+        # start in the meantime give up on the shared event cancel.
+        assert self.finished is not None
+        assert self.pool is not None
+        start = perf_counter()
+        workers = self.workers or os.cpu_count() or 1
+        context = multiprocessing.get_context(self.context)
+        cancel = context.Event()
+        worker = self.worker()
+        # The executor is not used as a context manager, whose exit would
+        # wait for the running jobs even after the pool is known to be T.
+        executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_initialize, initargs=(worker, cancel))
+        try:
+            # Jobs in flight are kept, so that checkpoints include them.
+            running: dict[Future, tuple[list[α], Matrix]] = {}
+            while True:
+                # Only a few jobs per worker are in flight, so that lazily
+                # generated jobs are not all materialized at once.
+                while len(running) < 2 * workers and (job := self.next_job()) is not None:
+                    (variables, f) = job
+                    running[executor.submit(_process_job, variables, pack(f))] = job
+                if not running:
+                    break
+                (done, _) = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    (result, pool, cursors, finished) = future.result()
+                    if result == ():
+                        cancel.set()
+                        _terminate(executor)
+                        return ()
+                    self.pool.extend((ys, unpack(f)) for (ys, f) in pool)
+                    self.count_jobs(len(pool))
+                    self.cursors.extend(Cursor(ys, unpack(f)) for (ys, f) in cursors)
+                    self.finished.extend(unpack(f) for f in finished)
+                self.save_if_due(tuple(running.values()))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if self.tracer:
+            self.tracer.emit(ProcessPool(self, perf_counter() - start, finished=len(self.finished)))
+        assert not self.pool and not self.cursors
+        return None
+
+    def save_if_due(self, running: tuple[tuple[list[α], Matrix], ...] = ()) -> None:
+        if self.checkpoint is not None and perf_counter() - self.saved >= self.interval:
+            self.save(self.checkpoint, running)
+            self.saved = perf_counter()
+
+    def save(self, path: str, running: tuple[tuple[list[α], Matrix], ...] = ()) -> None:
+        # Saves the state of the elimination to path, see abc/checkpoint.py.
+        # Jobs that are running elsewhere are saved as part of the pool.
+        # Cursors are saved with their source formulas and the number of
+        # disjuncts consumed, without generating the remaining disjuncts.
+        jobs = list(self.pool) + list(running) if self.pool is not None else None
+        state = {
+            "blocks": self.blocks,
+            "matrix": pack(self.matrix) if self.matrix is not None else None,
+            "negated": self.negated,
+            "pool": [(variables, pack(f)) for (variables, f) in jobs] if jobs is not None else None,
+            "finished": [pack(f) for f in self.finished] if self.finished is not None else None,
+            "cursors": [(c.variables, pack(c.f), c.consumed) for c in self.cursors],
+        }
+        checkpoint.save(path, state)
+
+    def restore(self, state: dict[str, Any]) -> None:
+        self.blocks = state["blocks"]
+        self.matrix = unpack(state["matrix"]) if state["matrix"] is not None else None
+        self.negated = state["negated"]
+        pool = state["pool"]
+        self.pool = None
+        if pool is not None:
+            self.pool = Pool(self.estimate, ((variables, unpack(f)) for (variables, f) in pool))
+        self.cursors = [Cursor(variables, unpack(f), consumed) for (variables, f, consumed) in state["cursors"]]
+        finished = state["finished"]
+        self.finished = Finished(self.interner, map(unpack, finished)) if finished is not None else None
+
+    def worker(self) -> "QuantifierElimination[α]":
+        # Returns a copy of self without the state of the elimination, to be
+        # sent to worker processes. With start methods other than fork, the
+        # copy is pickled. So it gets a simplifier, an interner and caches of
+        # its own, which would otherwise carry the formulas of this process
+        # along. Theories with further caches extend this.
+        worker = copy.copy(self)
+        (worker.blocks, worker.matrix, worker.negated, worker.pool, worker.finished) = (None,) * 5
+        (worker.workers, worker.cursors, worker.stats) = (None, [], None)
+        worker.checkpoint = None
+        worker.tracer = Tracer(logger)
+        empty = getattr(self.simplify, "empty", None)
+        if empty is not None:
+            worker.simplify = empty()
+        worker.interner = getattr(worker.simplify, "interner", None) or Interner()
+        worker.memo = Memo(self.memo.capacity)
+        return worker
+
+    def cancelled(self) -> bool:
+        return self.cancel is not None and self.cancel.is_set()
+
+    def process_job(self, variables: list[α], f: Matrix) -> Optional[tuple[()]]:
+        # Runs one elimination step on the job (variables, f). The result goes
+        # to self.finished if all variables are eliminated, and back to
+        # self.pool otherwise. Returns () if the job is equivalent to T.
+        assert self.finished is not None
+        assert variables
+
+        if self.cancelled():
+            return None
+
+        if f is T:
+            return ()
+
+        start = perf_counter()
+
+        known = self.feasible(f)
+        if known is False:
+            # f is unsatisfiable, drop the job.
+            return None
+        elif known is True and f.get_vars().free <= set(variables):
+            # f is satisfiable and all its variables are to be
+            # eliminated, so the job is equivalent to T.
+            return ()
 
-            if not x:
+        g = self.qep(variables, f)
+        if g is None:
+            x = self.select(variables, f)
+
+            if x is None:
                 # Variables to eliminate do not occur in f, done!
                 self.finished.append(f)
-                continue
+                return None
 
             (hasx, other) = ([], [])
             for a in conjunctive_core(f):
                 (hasx if x in a.get_vars().free else other).append(a)
 
-            if hasx:
-                f = self.simplify(And(self.qe1p(x, And(*hasx)), And(*other)))
-                if f is T:
-                    return ()
-                variables.remove(x)
+            key = (x, frozenset(map(self.interner.id, hasx)))
+            g = And(self.memo.lookup(key, lambda: self.timed_qe1p(x, And(*hasx))), And(*other))
+            variables.remove(x)
+
+        if self.cancelled():
+            return None
+
+        simplifying = perf_counter()
+        f = self.simplify(g)
+        if self.stats is not None:
+            self.stats.simplify_time += perf_counter() - simplifying
+        if self.reduce is not None:
+            reducing = perf_counter()
+            f = self.reduce(f)
+            if self.stats is not None:
+                self.stats.reduce_time += perf_counter() - reducing
+
+        n = size(f) if self.stats is not None or self.tracer else 0
+        if self.stats is not None:
+            self.stats.step(n)
+        if f is T:
+            return ()
 
-            logger.info(f"{self.qe1p.__qualname__}: {f}")
+        if self.tracer:
+            self.tracer.emit(Step(self, perf_counter() - start, variables=len(variables), size=n, formula=f))
 
-            if not variables:
-                # Done!
+        if not variables:
+            # Done! f is equivalent to the job with the eliminated variables
+            # quantified existentially, so f is satisfiable if the job is.
+            if known is True or self.feasible(f) is not False:
                 self.finished.append(f)
-            else:
-                # Not done, push back to pool.
-                self.push_to_pool(variables, f)
-
-        logger.info(f"{self.process_pool.__qualname__}: {self}")
-        assert self.pool == []
+        else:
+            # Not done, push back to pool.
+            self.push_to_pool(variables, f)
         return None
 
+    def timed_qe1p(self, x: α, f: Matrix) -> Matrix:
+        if self.stats is None:
+            return self.qe1p(x, f)
+        start = perf_counter()
+        result = self.qe1p(x, f)
+        self.stats.qe1p_calls += 1
+        self.stats.qe1p_time += perf_counter() - start
+        return result
+
+    def caches(self) -> dict[str, tuple[int, int]]:
+        # Returns hits and misses of the caches in use, by name. Theories may
+        # add their own caches.
+        caches = {"qe1p": (self.memo.hits, self.memo.misses)}
+        memo = getattr(self.simplify, "memo", None)
+        if isinstance(memo, Memo):
+            caches["simplify"] = (memo.hits, memo.misses)
+        return caches
+
     @abstractmethod
     def qe1p(self, v: α, f: Matrix) -> Matrix:
         # This is implemented in a subclass of this class within  a "theories"
         # module.
         ...
 
+    def select(self, variables: list[α], f: Matrix) -> Optional[α]:
+        # Chooses the next variable to eliminate from the job (variables, f),
+        # or returns None if none of the variables occurs in f. This picks the
+        # variable of least cost, breaking ties in favor of the variable with
+        # fewest occurrences. Theories may override this altogether, or only
+        # provide cost.
+        counter = Counter(var_occs(f)).most_common()
+        candidates = [x for (x, _) in reversed(counter) if x in variables]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda x: self.cost(x, f))
+
+    def cost(self, x: α, f: Matrix) -> Any:
+        # Estimates the cost of eliminating x from f. Any ordered values will
+        # do. By default all variables cost the same.
+        return 0
+
+    def estimate(self, variables: list[α], f: Matrix) -> Any:
+        # Estimates the cost of the job (variables, f), so that cheap jobs are
+        # processed first, see Pool. Any ordered values will do. By default,
+        # jobs with fewer variables left and then smaller jobs come first.
+        return (len(variables), sum(1 for _ in atoms(f)))
+
+    def feasible(self, f: Matrix) -> Optional[bool]:
+        # Theories may override this with a decision procedure for the
+        # satisfiability of the conjunction f, with all variables read
+        # existentially. process_pool then drops unsatisfiable jobs early.
+        # None means unknown.
+        return None
+
+    def qep(self, variables: list[α], f: Matrix) -> Optional[Matrix]:
+        # Theories may override this to eliminate several variables from the
+        # conjunction f at once, e.g. to keep state across elimination steps
+        # that would be lost when going through qe1p and the simplifier. The
+        # eliminated variables, at least one, must be removed from variables.
+        # None means that process_pool eliminates the next variable via qe1p.
+        return None
+
     def collect_finished(self) -> None:
         assert self.finished is not None
+        start = perf_counter()
 
         disj = Or(*self.finished)
 
@@ -190,9 +728,11 @@ class QuantifierElimination(ABC, Generic[α]):
 
         self.matrix = disj
         self.pool = None
+        self.cursors = []
         self.finished = None
         self.negated = None
-        logger.info(f"{self.collect_finished.__qualname__}: {self}")
+        if self.tracer:
+            self.tracer.emit(CollectFinished(self, perf_counter() - start, size=size(self.matrix)))
 
     def __repr__(self):
         # As usual, this prints the current state in format so that it can be
@@ -242,3 +782,39 @@ class QuantifierElimination(ABC, Generic[α]):
             f"    finished = {finished}\n"
             f"]"
         )
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    # Stops the worker processes of executor without waiting for the jobs
+    # they are running. ProcessPoolExecutor.terminate_workers is new in
+    # Python 3.14, before that the processes are terminated directly.
+    terminate = getattr(executor, "terminate_workers", None)
+    if terminate is not None:
+        terminate()
+        return
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+
+
+# The copy of QuantifierElimination that jobs run on in a worker process.
+_worker: Optional[QuantifierElimination] = None
+
+
+def _initialize(worker: QuantifierElimination, cancel: Any) -> None:
+    # worker is a copy made within the scope of the coordinator, so that its
+    # caches are kept for the life of the process, which ends with the run.
+    global _worker
+    _worker = worker
+    _worker.cancel = cancel
+
+
+def _process_job(variables: list, packed: Any) -> tuple[Optional[tuple[()]], list, list, list]:
+    assert _worker is not None
+    if _worker.cancelled():
+        return (None, [], [], [])
+    (_worker.pool, _worker.finished, _worker.cursors) = (Pool(_worker.estimate), Finished(_worker.interner), [])
+    result = _worker.process_job(variables, unpack(packed))
+    pool = [(ys, pack(f)) for (ys, f) in _worker.pool]
+    # Cursors are sent back unstarted, as their variables and source formula.
+    cursors = [(c.variables, pack(c.f)) for c in _worker.cursors]
+    return (result, pool, cursors, [pack(f) for f in _worker.finished])
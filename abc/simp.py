@@ -1,21 +1,32 @@
-from typing import Generic, Optional, TypeVar, Any, TypeGuard
+from typing import Generic, Hashable, Iterator, Optional, TypeVar, Any, TypeGuard
 
 from logic1.firstorder import AtomicFormula
 from logic1.firstorder.boolean import And, AndOr, Equivalent, Implies, Not, Or
 from logic1.firstorder.formula import Formula
-from logic1.firstorder.quantified import QuantifiedFormula
+from logic1.firstorder.quantified import All, Ex, QuantifiedFormula
 from logic1.firstorder.truth import F, T, TruthValue
 
+import copy
+from contextlib import contextmanager
 from enum import Enum
 from functools import cmp_to_key
 
-from ..util import encode, implies, inv_not, list_isinstance
+from ..util import Memo, encode, inv_not, list_isinstance
+from .intern import Interner
 
 α = TypeVar("α", bound=AtomicFormula, contravariant=True)
 β = TypeVar("β")
 
 
 class Simplifier(Generic[α, β]):
+    """
+    Simplifies formulas, caching results by interned subformula, see lookup.
+    Within one call, each distinct subformula is simplified once. The cache
+    is released when the outermost call returns, unless a scope is open. To
+    share it between calls, make them within scope(), as QuantifierElimination
+    does for each run.
+    """
+
     class Merge(Enum):
         L = 1
         R = 2
@@ -26,6 +37,30 @@ class Simplifier(Generic[α, β]):
         def __repr__(self) -> str:
             return self.__str__()
 
+    def __init__(self, memo: int = 4096, polarity: bool = False, expand: Optional[int] = None) -> None:
+        # Arguments of And and Or are interned, so that duplicates are found
+        # by identity rather than by structural equality, see abc/intern.py.
+        self.interner = Interner()
+        # Results are cached by the id of the interned input. Subformulas that
+        # occur several times, within one formula or, inside a scope, in
+        # several formulas, are thus simplified once. memo is the number of
+        # entries kept, 0 disables caching.
+        self.memo: Memo[Formula] = Memo(memo)
+        # The interner and the caches keep every formula they have seen alive.
+        # They are cleared when the outermost call returns, unless a scope is
+        # open, see scope.
+        self.calls = 0
+        self.scopes = 0
+        # If polarity is set, negations are pushed down while descending, see
+        # negate, instead of simplifying the argument of Not first and then
+        # the result of applying De Morgan's laws to it.
+        self.polarity = polarity
+        # If expand is set, equivalences whose operands are nested deeper than
+        # expand are not expanded, see equivalence.
+        self.expand = expand
+        # Depths of interned formulas by their ids, see depth.
+        self.depths: dict[int, int] = {}
+
     def atom(self, a: α) -> α | TruthValue:
         return a
 
@@ -35,10 +70,127 @@ class Simplifier(Generic[α, β]):
     def merge(self, ctx: type[And | Or], a: α, b: β) -> Optional[Merge | TruthValue | α]:
         return None
 
+    def key(self, a: α) -> Hashable:
+        # Atoms are only merged with atoms of equal key. Theories should
+        # override this such that merge returns None for atoms of different
+        # keys and merged atoms keep the key of their arguments. Then the
+        # arguments of And and Or are merged bucket by bucket instead of
+        # pairwise across all arguments. By default, there is one bucket.
+        return None
+
+    def merge_all(self, ctx: type[And | Or], args: list[α]) -> Optional[list[α]]:
+        # Merges the atoms in args pairwise until nothing changes, within
+        # buckets of equal key. Returns None if the result is the dual truth
+        # value of ctx, i.e. F for And and T for Or.
+        buckets: dict[Hashable, list[Optional[α]]] = {}
+        for a in args:
+            buckets.setdefault(self.key(a), []).append(a)
+        result: list[α] = []
+        for bucket in buckets.values():
+            if len(bucket) > 1 and self.merge_bucket(ctx, bucket) is None:
+                return None
+            result.extend(a for a in bucket if a is not None)
+        return result
+
+    def merge_bucket(self, ctx: type[And | Or], args: list[Optional[α]]) -> Optional[list[Optional[α]]]:
+        # Merges args in place, replacing merged atoms by None. Returns None
+        # if the result is the dual truth value of ctx.
+        dual = F if ctx is And else T
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(args)):
+                ai = args[i]
+                if ai is None:
+                    continue
+                for j in range(i + 1, len(args)):
+                    aj = args[j]
+                    if aj is None:
+                        continue
+                    merged = self.merge(ctx, ai, aj)  # type: ignore
+                    if merged is None:
+                        continue
+                    elif isinstance(merged, TruthValue):
+                        if merged is dual:
+                            return None
+                        else:
+                            args[i] = None
+                            args[j] = None
+                            changed = True
+                            break
+                    elif merged is Simplifier.Merge.R:
+                        args[i] = None
+                        ai = None
+                        changed = True
+                        break
+                    elif merged is Simplifier.Merge.L:
+                        args[j] = None
+                        changed = True
+                    elif isinstance(merged, AtomicFormula):
+                        args[i] = merged
+                        ai = merged
+                        args[j] = None
+                    else:
+                        raise NotImplementedError()
+        return args
+
     def guard(self, x: Any) -> TypeGuard[α]:
         return isinstance(x, AtomicFormula)
 
     def __call__(self, φ: Formula) -> Formula:
+        return self.lookup(φ, False)
+
+    def lookup(self, φ: Formula, negated: bool) -> Formula:
+        # Returns the simplification of φ, or of ¬φ if negated, via self.memo.
+        self.calls += 1
+        try:
+            φ = self.interner.intern(φ)
+            if negated:
+                return self.memo.lookup(("¬", self.interner.id(φ)), lambda: self.simplify_negation(φ))
+            return self.memo.lookup(self.interner.id(φ), lambda: self.simplify(φ))
+        finally:
+            self.calls -= 1
+            if not self.calls and not self.scopes:
+                self.clear()
+
+    @contextmanager
+    def scope(self) -> Iterator[None]:
+        """
+        Keeps interned formulas and cached results across calls until the
+        outermost scope is left.
+
+        >>> from logic1.atomlib.sympy import Eq
+        >>> from sympy.abc import x
+        >>> s = Simplifier()
+        >>> with s.scope():
+        ...     (s(Eq(x, 0)), s(Eq(x, 0)))[0]
+        Eq(x, 0)
+        >>> (s.memo.hits, len(s.memo.entries))
+        (1, 0)
+        """
+        self.scopes += 1
+        try:
+            yield
+        finally:
+            self.scopes -= 1
+            if not self.scopes and not self.calls:
+                self.clear()
+
+    def empty(self) -> "Simplifier[α, β]":
+        # Returns a copy of self with an interner and caches of its own, e.g.
+        # to be sent to another process.
+        simplifier = copy.copy(self)
+        simplifier.interner = Interner()
+        simplifier.memo = Memo(self.memo.capacity)
+        simplifier.depths = {}
+        return simplifier
+
+    def clear(self) -> None:
+        self.interner.clear()
+        self.memo.clear()
+        self.depths.clear()
+
+    def simplify(self, φ: Formula) -> Formula:
         """
         >>> from logic1.firstorder.quantified import Ex, All
         >>> from sympy.abc import x, y
@@ -49,25 +201,11 @@ class Simplifier(Generic[α, β]):
         >>> s(All(x, Or(F, F)))
         F
         """
-
-        def formula_cmp(φ: Formula, ψ: Formula):
-            if isinstance(φ, AtomicFormula) and isinstance(ψ, AtomicFormula):
-                # Assumes that both atomic formulae are simplified.
-                assert self.guard(φ)
-                assert self.guard(ψ)
-                return self.cmp(φ, ψ)
-            elif isinstance(φ, AtomicFormula) and not isinstance(ψ, AtomicFormula):
-                return -1
-            elif not isinstance(φ, AtomicFormula) and isinstance(ψ, AtomicFormula):
-                return 1
-            else:
-                return 0
-
         match φ:
-            case Implies(args=(φ, ψ)):  # φ → ψ
-                return self(implies(φ, ψ))
+            case Implies(args=(φ, ψ)):  # φ → ψ ≡ ¬φ ∨ ψ
+                return self.junction(Or, [self.negate(φ), self(ψ)])
             case Equivalent(args=(φ, ψ)):  # φ ↔ ψ
-                return self(implies(φ, ψ) & implies(ψ, φ))
+                return self.equivalence(self(φ), self.negate(φ), self(ψ), self.negate(ψ))
             case QuantifiedFormula(var=x, arg=ψ):  # φ = ○x.ψ where ○ is ∀ or ∃
                 ψ = self(ψ)
                 return ψ if x not in ψ.get_vars().free else φ.func(x, ψ)
@@ -76,6 +214,8 @@ class Simplifier(Generic[α, β]):
             case AtomicFormula():  # φ is an atom, e.g., s ○ t where ○ is one of >, ≥, <, ≤, =, ≠
                 assert self.guard(φ)
                 return self.atom(φ)
+            case Not(arg=ψ) if self.polarity:  # φ = ¬ψ
+                return self.negate(ψ)
             case Not(arg=ψ):  # φ = ¬ψ
                 match self(ψ):
                     case TruthValue():
@@ -87,64 +227,136 @@ class Simplifier(Generic[α, β]):
                         # Definition of implication using ¬ and ∨ and De Morgan's Law
                         return self(φ & inv_not(ψ))
                     case Equivalent(args=(φ, ψ)):
-                        # Definition of equivalence using ¬ and ∨ and De Morgan's Law
-                        return self((φ & inv_not(φ) | (ψ & inv_not(ψ))))
+                        # ¬(φ ↔ ψ) ≡ φ ↔ ¬ψ, where φ and ψ are simplified already
+                        return self.equivalence(φ, self.negate(φ), self.negate(ψ), ψ)
                     case AtomicFormula(args=args, complement_func=complement):
                         # Push negation down into atomic formula.
                         return self(complement(*args))
+                    case QuantifiedFormula(var=x, arg=ψ) as χ:
+                        # ¬○x.ψ ≡ ●x.¬ψ, where ψ is simplified already
+                        ψ = self.negate(ψ)
+                        return ψ if x not in ψ.get_vars().free else (All if isinstance(χ, Ex) else Ex)(x, ψ)
                     case _:
                         raise NotImplementedError()
             case AndOr(args=args, func=func):  # φ = ψ₁ ○ … ○ ψₙ where ○ is ∧ or ∨
-                (id, dual) = (T, F) if func == And else (F, T)
-                args = filter(lambda x: x is not id, map(self, args))
-                args = list(set(args))  # TODO: Find a better way to get unique elements, if this is too slow.
-
-                if not args:
-                    return id
-                if len(args) == 1:
-                    return args[0]
-                elif dual in args:
-                    return dual
-
-                if list_isinstance(args, AtomicFormula | None):
-                    changed = True
-                    while changed:
-                        changed = False
-                        for i in range(len(args)):
-                            ai = args[i]
-                            if ai is None:
-                                continue
-                            for j in range(i + 1, len(args)):
-                                aj = args[j]
-                                if aj is None:
-                                    continue
-                                merged = self.merge(φ.func, ai, aj)  # type: ignore
-                                if merged is None:
-                                    continue
-                                elif isinstance(merged, TruthValue):
-                                    if merged is dual:
-                                        return dual
-                                    else:
-                                        args[i] = None
-                                        args[j] = None
-                                        changed = True
-                                        break
-                                elif merged is Simplifier.Merge.R:
-                                    args[i] = None
-                                    ai = None
-                                    changed = True
-                                    break
-                                elif merged is Simplifier.Merge.L:
-                                    args[j] = None
-                                    changed = True
-                                elif isinstance(merged, AtomicFormula):
-                                    args[i] = merged
-                                    ai = merged
-                                    args[j] = None
-                                else:
-                                    raise NotImplementedError()
-                    args = list(filter(lambda x: x is not None, args))
-
-                return func(*sorted(args, key=cmp_to_key(formula_cmp)))  # type: ignore
+                return self.junction(func, list(map(self, args)))
 
         return φ
+
+    def junction(self, func: type[And | Or], args: list[Formula]) -> Formula:
+        # Returns func(*args) simplified, where args are simplified already.
+        def formula_cmp(φ: Formula, ψ: Formula):
+            if isinstance(φ, AtomicFormula) and isinstance(ψ, AtomicFormula):
+                # Assumes that both atomic formulae are simplified.
+                assert self.guard(φ)
+                assert self.guard(ψ)
+                return self.cmp(φ, ψ)
+            elif isinstance(φ, AtomicFormula) and not isinstance(ψ, AtomicFormula):
+                return -1
+            elif not isinstance(φ, AtomicFormula) and isinstance(ψ, AtomicFormula):
+                return 1
+            else:
+                return 0
+
+        (id, dual) = (T, F) if func == And else (F, T)
+        # Arguments are unique iff their interned ids are.
+        unique = {self.interner.id(x): x for x in args if x is not id}
+        args = list(unique.values())
+
+        if not args:
+            return id
+        if len(args) == 1:
+            return args[0]
+        elif dual in args:
+            return dual
+
+        if list_isinstance(args, AtomicFormula):
+            merged = self.merge_all(func, args)
+            if merged is None:
+                return dual
+            args = merged
+
+        return func(*sorted(args, key=cmp_to_key(formula_cmp)))  # type: ignore
+
+    def negate(self, φ: Formula) -> Formula:
+        """
+        Returns the simplification of ¬φ. The negation is pushed down to the
+        atoms while descending, so every subformula of φ is simplified once
+        per polarity. Results are cached like those of __call__.
+
+        >>> from logic1.firstorder.quantified import Ex
+        >>> from sympy.abc import x
+        >>> s = Simplifier(polarity=True)
+        >>> s(Not(Ex(x, And(T, Not(F)))))
+        F
+        """
+        return self.lookup(φ, True)
+
+    def simplify_negation(self, φ: Formula) -> Formula:
+        match φ:
+            case TruthValue():
+                return encode(φ is F)
+            case AtomicFormula(args=args, complement_func=complement):
+                # Push negation down into atomic formula.
+                return self(complement(*args))
+            case Not(arg=ψ):
+                return self(ψ)
+            case AndOr(args=args, dual_func=dual):
+                # De Morgan's Law
+                return self.junction(dual, [self.negate(ψ) for ψ in args])
+            case Implies(args=(φ, ψ)):  # ¬(φ → ψ) ≡ φ ∧ ¬ψ
+                return self.junction(And, [self(φ), self.negate(ψ)])
+            case Equivalent(args=(φ, ψ)):  # ¬(φ ↔ ψ) ≡ φ ↔ ¬ψ
+                return self.equivalence(self(φ), self.negate(φ), self.negate(ψ), self(ψ))
+            case QuantifiedFormula(var=x, arg=ψ):  # ¬○x.ψ ≡ ●x.¬ψ
+                ψ = self.negate(ψ)
+                return ψ if x not in ψ.get_vars().free else (All if isinstance(φ, Ex) else Ex)(x, ψ)
+            case _:
+                raise NotImplementedError()
+
+    def equivalence(self, a: Formula, na: Formula, b: Formula, nb: Formula) -> Formula:
+        """
+        Returns the simplification of a ↔ b, where a, b and their negations
+        na, nb are simplified already. Each operand thus occurs in the result
+        as one shared node per polarity. If the operands are nested deeper than
+        self.expand, the result is Equivalent(a, b) instead of its expansion.
+        This only bounds the size of the result of the simplifier. Whoever
+        converts it to a normal form, e.g. QuantifierElimination via to_dnf,
+        still expands the equivalence.
+
+        >>> from logic1.atomlib.sympy import Eq
+        >>> from sympy.abc import x, y
+        >>> φ = Equivalent(Eq(x, 0), Equivalent(Eq(y, 0), Eq(x, y)))
+        >>> isinstance(Simplifier(expand=1)(φ), Equivalent)
+        True
+        >>> isinstance(Simplifier()(φ), Equivalent)
+        False
+        """
+        (i, j) = (self.interner.id(a), self.interner.id(b))
+        if i == j:
+            return T
+        if self.interner.id(na) == j:
+            return F
+        for (c, d, nd) in ((a, b, nb), (b, a, na)):
+            if c is T:
+                return d
+            if c is F:
+                return nd
+        if self.expand is not None and max(self.depth(a), self.depth(b)) > self.expand:
+            return Equivalent(a, b)
+        # (a → b) ∧ (b → a)
+        return self.junction(And, [self.junction(Or, [na, b]), self.junction(Or, [nb, a])])
+
+    def depth(self, φ: Formula) -> int:
+        # Nesting depth of Boolean operators and quantifiers, computed once
+        # per interned subformula.
+        φ = self.interner.intern(φ)
+        i = self.interner.id(φ)
+        if i not in self.depths:
+            if isinstance(φ, (AtomicFormula, TruthValue)):
+                self.depths[i] = 0
+            elif isinstance(φ, QuantifiedFormula):
+                self.depths[i] = 1 + self.depth(φ.arg)
+            else:
+                self.depths[i] = 1 + max(map(self.depth, φ.args))
+        return self.depths[i]
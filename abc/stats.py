@@ -0,0 +1,47 @@
+"""
+Statistics of one run of QuantifierElimination.qe.
+
+>>> stats = Stats(qe1p_calls=2, caches={"qe1p": (1, 3)})
+>>> stats.as_dict()["hit_rates"]
+{'qe1p': 0.25}
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+
+@dataclass
+class Stats:
+    # Wall time per quantifier block in seconds, in order of elimination.
+    blocks: list[float] = field(default_factory=list)
+    qe1p_calls: int = 0
+    qe1p_time: float = 0.0
+    simplify_time: float = 0.0
+    reduce_time: float = 0.0
+    # Number of jobs created by DNF expansion, and the maximal length of the
+    # pool.
+    jobs: int = 0
+    peak_pool: int = 0
+    # Number of elimination steps, and the total and the maximal number of
+    # atoms in their results.
+    steps: int = 0
+    atoms: int = 0
+    max_atoms: int = 0
+    # Hits and misses per cache, see QuantifierElimination.caches.
+    caches: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+    def step(self, atoms: int) -> None:
+        self.steps += 1
+        self.atoms += atoms
+        self.max_atoms = max(self.max_atoms, atoms)
+
+    def as_dict(self) -> dict[str, Any]:
+        result = asdict(self)
+        result["hit_rates"] = {
+            name: hits / (hits + misses) if hits + misses else None for (name, (hits, misses)) in self.caches.items()
+        }
+        return result
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
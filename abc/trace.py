@@ -0,0 +1,96 @@
+"""
+Structured tracing of QuantifierElimination.
+
+The driver emits an Event after each of its steps, carrying counts, sizes and
+the duration of the step. Events are only created if the Tracer is enabled,
+i.e. if some subscriber is registered or the logger is enabled for INFO.
+The human-readable dump of the state of the driver is only rendered when an
+event is logged.
+
+>>> tracer = Tracer(logging.getLogger("trace.doctest"))
+>>> bool(tracer)
+False
+>>> events = []
+>>> tracer.subscribe(events.append)
+>>> tracer.emit(ProcessPool(None, 0.5, finished=3))
+>>> [(type(e).__name__, e.finished) for e in events]
+[('ProcessPool', 3)]
+"""
+
+import logging
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Callable
+
+
+@dataclass
+class Event:
+    # The QuantifierElimination that emitted the event.
+    qe: Any = field(repr=False)
+    # Wall time of the step in seconds.
+    duration: float
+    # Seconds since the start of the elimination, set by Tracer.emit.
+    elapsed: float = field(init=False, default=0.0)
+
+    def __str__(self) -> str:
+        return str(self.qe)
+
+
+@dataclass
+class Setup(Event):
+    blocks: int
+
+
+@dataclass
+class PopBlock(Event):
+    quantifier: str
+    variables: int
+    jobs: int
+
+
+@dataclass
+class Step(Event):
+    # One elimination step on a job, see QuantifierElimination.process_job.
+    variables: int
+    size: int
+    formula: Any = field(repr=False)
+
+    def __str__(self) -> str:
+        return str(self.formula)
+
+
+@dataclass
+class ProcessPool(Event):
+    finished: int
+
+
+@dataclass
+class CollectFinished(Event):
+    size: int
+
+
+class Tracer:
+    def __init__(self, logger: logging.Logger) -> None:
+        self.logger = logger
+        self.subscribers: list[Callable[[Event], None]] = []
+        self.started = perf_counter()
+
+    def start(self) -> None:
+        self.started = perf_counter()
+
+    def subscribe(self, subscriber: Callable[[Event], None]) -> None:
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[Event], None]) -> None:
+        self.subscribers.remove(subscriber)
+
+    def __bool__(self) -> bool:
+        return bool(self.subscribers) or self.logger.isEnabledFor(logging.INFO)
+
+    def emit(self, event: Event) -> None:
+        event.elapsed = perf_counter() - self.started
+        for subscriber in self.subscribers:
+            subscriber(event)
+        if self.logger.isEnabledFor(logging.INFO):
+            # The message, and thus the dump, is only rendered by handlers.
+            self.logger.info("%s[%0.0f ms]: %s", type(event).__name__, 1000 * event.elapsed, event)
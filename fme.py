@@ -1,12 +1,12 @@
 import logging
-from itertools import product
 
 from logic1.atomlib.sympy import BinaryAtomicFormula, Eq, Ge, Gt, Le, Lt, Ne
 from logic1.firstorder.formula import And, Formula
 from logic1.firstorder.quantified import Ex
 
 from .bound import Bound, remove_unbounded_list
-from .theories.rings import poly, Simplifier
+from .theories.linear import System
+from .theories.rings import Simplifier
 from .util import closure, conjunctive_core, is_conjunctive, no_alternations
 
 simplify_prefer_lt = Simplifier(prefer=Lt)
@@ -21,28 +21,24 @@ def applicable(φ: Formula) -> bool:
     return no_alternations(Ex, φ) and is_conjunctive(φ)
 
 
-def combine_op(
-    lower: BinaryAtomicFormula, upper: BinaryAtomicFormula
-) -> type[BinaryAtomicFormula]:
-    if isinstance(lower, Le) and isinstance(upper, Le):
-        return Le
-    if isinstance(lower, Lt) and isinstance(upper, Lt):
-        return Lt
-    if isinstance(lower, Lt) and isinstance(upper, Le):
-        return Lt
-    if isinstance(lower, Le) and isinstance(upper, Lt):
-        return Lt
-    if isinstance(lower, Eq):
-        return type(upper)
-    if isinstance(upper, Eq):
-        return type(lower)
-    raise NotImplementedError()
-
-
-def fme(φ: Formula, x, eliminate_unbounded: bool = True) -> Formula:
+def fme(φ: Formula, x, eliminate_unbounded: bool = True, prune: bool = False) -> Formula:
     """
     Assumes that φ is in prenex normal form and in conjunctive normal form.
+
+    x may also be a list of variables, which are then eliminated one after
+    the other. If prune is set, redundant combinations are discarded by the
+    criteria of Chernikov, Kohler and Imbert (see theories.linear). These
+    only pay off across several steps, so pass all variables at once.
     """
+    if isinstance(x, list):
+        if prune:
+            return fme_pruned(φ, x, eliminate_unbounded)
+        for y in x:
+            φ = fme(φ, y, eliminate_unbounded)
+        return φ
+    elif prune:
+        return fme_pruned(φ, [x], eliminate_unbounded)
+
     if x not in φ.get_qvars():
         return φ
 
@@ -72,7 +68,7 @@ def fme(φ: Formula, x, eliminate_unbounded: bool = True) -> Formula:
         ):
             raise NotImplementedError("unknown relation of type " + str(type(φ)))
 
-        b = bound(row, x)
+        b = Bound.of(row, x)
         logging.debug(str(row) + " is " + str(b) + " for " + str(x))
         if not b:
             result.append(row)
@@ -90,36 +86,32 @@ def fme(φ: Formula, x, eliminate_unbounded: bool = True) -> Formula:
                 + str(x)
                 + " is not bounded"
             )
-    elif both:
-        # There is at least one equation for x,
-        # so we can use it to substitute x in
-        # all other rows.
-        e = poly(both[0])
-        a = e.coeff_monomial(x)
-        e = e - (a * x).as_poly()
-        for row in lower + upper + both[1:]:
-            p = poly(row)
-            b = p.coeff_monomial(x)
-            p = (p - (b * x).as_poly()) * a
-            p = p + (-b * e)
-            result.append((row.func)(p.as_expr(), 0))  # type: ignore
     else:
-        # Blow up exponentially!
-        for (loweri, upperi) in product(lower, upper):
-            logging.debug(
-                "Combining lower bound "
-                + str(loweri)
-                + " and upper bound "
-                + str(upperi)
-            )
-            (lp, up) = (poly(loweri), poly(upperi))
-            (lps, ups) = (
-                lp.mul_ground(up.coeff_monomial(x)),
-                up.mul_ground(abs(lp.coeff_monomial(x))),
-            )
-            combo = (combine_op(loweri, upperi))(lps.add(ups).as_expr(), 0)
-            logging.debug(combo)
-            result.append(combo)
+        # If there is an equation for x, it is used to substitute x in all
+        # other rows, otherwise every lower bound is combined with every upper
+        # bound. Rows are normalized as they are created, so duplicate and
+        # dominated combinations are never turned into atoms.
+        result.extend(System.of(both + lower + upper).eliminate(x).atoms())
+
+    if eliminate_unbounded:
+        result = remove_unbounded_list(result)
+
+    return simplify_prefer_lt(closure(Ex, And(*result)))
+
+
+def fme_pruned(φ: Formula, xs: list, eliminate_unbounded: bool = True) -> Formula:
+    xs = [x for x in xs if x in φ.get_qvars()]
+    if not xs:
+        return φ
+
+    rows = conjunctive_core(φ)
+    if eliminate_unbounded:
+        rows = remove_unbounded_list(rows)
+
+    s = System.of(rows).tracked()
+    for x in xs:
+        s = s.eliminate(x)
+    result = s.atoms()
 
     if eliminate_unbounded:
         result = remove_unbounded_list(result)
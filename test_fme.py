@@ -76,6 +76,18 @@ class FourierMotzkinTests(unittest.TestCase):
         f = fme(f, y)
         self.assertEqual(f, F)
 
+    def test_prune(self):
+        f = exsimp(
+            Ge(x + y + 2 * z, 1),
+            Ge(-x + y + z, 2),
+            Ge(x - y + z, 1),
+            Ge(-y - 3 * z, 0),
+        )
+
+        self.assertEqual(fme(f, [x, y, z], prune=True), F)
+        f = fme(f, [x, y], eliminate_unbounded=False, prune=True)
+        self.assertEqual(fme(f, z), F)
+
     def test_eq1(self):
         f = exsimp(Eq(x, 1), Eq(y, x))
         f = fme(f, x)
@@ -0,0 +1,701 @@
+"""
+Dense integer representation of conjunctions of linear atoms.
+
+A System holds a conjunction of atoms a₁x₁ + … + aₙxₙ + c ρ 0 with ρ one of
+=, ≤, < as a matrix of Python ints: one row per atom, one column per variable
+and a last column for the constant c. A separate vector holds the relation ρ
+of each row. Atoms with ≥ and > are negated on the way in. Rational
+coefficients are scaled to integers, which does not change the relation since
+the factor is positive. Python ints are arbitrary precision, so coefficient
+growth during elimination never overflows.
+
+Rows are only turned back into logic1 atoms at the boundary, in atoms() and
+to_formula(), so elimination itself never creates sympy objects.
+
+A system can optionally track the history of each row, i.e. the set of
+original rows it was derived from, as a bitset. Fourier-Motzkin elimination
+then discards combinations that are redundant by the criteria of Chernikov,
+Kohler and Imbert, see System.redundant.
+
+>>> from sympy.abc import x, y
+>>> s = System([x, y], [[1, -1, 0], [-1, 0, 2], [0, 1, -3]],
+...            [Relation.LE, Relation.LT, Relation.LE])
+>>> s.eliminate(x).rows
+[[0, 1, -3], [0, -1, 2]]
+>>> s.eliminate(x).rels
+[<Relation.LE: 1>, <Relation.LT: 2>]
+>>> s.tracked().eliminate(x).history
+[4, 3]
+"""
+
+from enum import IntEnum
+from fractions import Fraction
+from math import gcd, lcm
+from typing import Iterable, Iterator, Optional
+
+from logic1.atomlib.sympy import Eq, Ge, Gt, Le, Lt
+from logic1.firstorder.boolean import And
+from logic1.firstorder.formula import Formula
+from logic1.firstorder.truth import F, T
+from sympy import Add, Expr, Integer, Rational, Symbol
+
+from .simplex import feasible, implied
+
+Atom = Le | Lt | Ge | Gt | Eq
+Row = list[int]
+
+
+class Relation(IntEnum):
+    # The order matters: combining two rows yields the maximum of their
+    # relations, i.e. ≤ and < give <, while = never survives a combination
+    # with an inequality.
+    EQ = 0
+    LE = 1
+    LT = 2
+
+    @property
+    def func(self) -> type[Eq | Le | Lt]:
+        return (Eq, Le, Lt)[self]
+
+
+# The coefficients of the variables, the constant and the relation of an
+# atom, see linear_terms.
+Terms = tuple[dict[Symbol, int], int, Relation]
+
+
+def support(row: Row) -> int:
+    """
+    Returns the set of variables (columns) that occur in row as a bitset.
+
+    >>> support([0, 3, -1, 5])
+    6
+    """
+    return sum(1 << j for (j, a) in enumerate(row[:-1]) if a)
+
+
+def primitive(row: Row) -> Row:
+    """
+    Divides row by the gcd of its entries, which is positive and thus
+    preserves the relation.
+
+    >>> primitive([4, -6, 0, 2])
+    [2, -3, 0, 1]
+    """
+    g = gcd(*row)
+    return [a // g for a in row] if g > 1 else row
+
+
+def canonical(row: Row, rel: Relation) -> Row:
+    """
+    Returns the primitive part of row. For equations, the sign is fixed such
+    that the first nonzero coefficient is positive. For inequalities, the
+    sign is determined by the relation.
+
+    >>> canonical([-2, 4, 6], Relation.EQ)
+    [1, -2, -3]
+    >>> canonical([-2, 4, 6], Relation.LE)
+    [-1, 2, 3]
+    """
+    row = primitive(row)
+    if rel is Relation.EQ and next((a for a in row if a), 0) < 0:
+        row = [-a for a in row]
+    return row
+
+
+def holds(c: int, rel: Relation) -> bool:
+    """
+    Evaluates the ground row c ρ 0.
+    """
+    return c == 0 if rel is Relation.EQ else c <= 0 if rel is Relation.LE else c < 0
+
+
+def bound(row: Row, j: int, rel: Relation) -> tuple[Fraction, bool]:
+    """
+    Returns the value and strictness of the bound on x given by row, where x
+    is the only variable in row, at column j.
+
+    >>> bound([0, 2, -3], 1, Relation.LT)  # 2·y - 3 < 0
+    (Fraction(3, 2), True)
+    """
+    return (Fraction(-row[-1], row[j]), rel is Relation.LT)
+
+
+def stronger(a: tuple[Fraction, bool], b: tuple[Fraction, bool], upper: bool) -> bool:
+    """
+    Decides whether the bound a is stronger than the bound b, both upper or
+    both lower bounds.
+    """
+    if a[0] != b[0]:
+        return (a[0] < b[0]) == upper
+    return a[1] and not b[1]
+
+
+class Rows:
+    """
+    Collects canonical rows, see canonical(), keyed on their coefficients.
+    Duplicate rows and inequalities dominated by an inequality with the same
+    coefficients are never stored: of a·x + c ρ 0 and a·x + c' ρ' 0 only the
+    one with the larger constant is kept, or the strict one if c = c'.
+
+    Inequalities with a single variable are kept apart as an interval per
+    variable, i.e. at most one lower and one upper bound, with the value and
+    strictness of each bound. A bound that is weaker than the current one is
+    implied and dropped, and when the interval becomes empty the
+    contradiction between the two bounds is added as a ground row.
+
+    Ground rows that hold are dropped. A ground row that does not hold sets
+    contradiction, after which the rows collected are meaningless.
+
+    >>> r = Rows(False)
+    >>> r.add([1, -1, 2], Relation.LE)
+    >>> r.add([2, -2, 2], Relation.LE)
+    >>> r.add([1, -1, 1], Relation.LT)
+    >>> r.add([0, 1, 1], Relation.EQ)
+    >>> r.add([0, -2, -2], Relation.EQ)
+    >>> (r.rows, r.rels)
+    ([[1, -1, 2], [0, 1, 1]], [<Relation.LE: 1>, <Relation.EQ: 0>])
+    >>> r = Rows(False)
+    >>> r.add([2, 0, -3], Relation.LE)  # x ≤ 3/2
+    >>> r.add([1, 0, -1], Relation.LE)  # x ≤ 1
+    >>> r.add([-1, 0, 1], Relation.LT)  # x > 1
+    >>> (r.rows, r.rels)
+    ([[1, 0, -1], [-1, 0, 1]], [<Relation.LE: 1>, <Relation.LT: 2>])
+    >>> r.contradiction
+    True
+    """
+
+    def __init__(self, track: bool) -> None:
+        self.rows: list[Row] = []
+        self.rels: list[Relation] = []
+        self.history: Optional[list[int]] = [] if track else None
+        self.index: dict[tuple, int] = {}
+        # intervals[(j, upper)] is the position of the lower (upper) bound on
+        # the variable at column j.
+        self.intervals: dict[tuple[int, bool], int] = {}
+        self.contradiction = False
+
+    def append(self, row: Row, rel: Relation, history: int) -> int:
+        self.rows.append(row)
+        self.rels.append(rel)
+        if self.history is not None:
+            self.history.append(history)
+        return len(self.rows) - 1
+
+    def replace(self, i: int, row: Row, rel: Relation, history: int) -> None:
+        self.rows[i] = row
+        self.rels[i] = rel
+        if self.history is not None:
+            self.history[i] = history
+
+    def add(self, row: Row, rel: Relation, history: int = 0) -> None:
+        row = canonical(row, rel)
+        occurring = [j for j in range(len(row) - 1) if row[j]]
+        if not occurring:
+            if not holds(row[-1], rel):
+                self.contradiction = True
+            return
+        if rel is not Relation.EQ:
+            if len(occurring) == 1:
+                self.add_bound(occurring[0], row, rel, history)
+                return
+        if rel is Relation.EQ:
+            key: tuple = (tuple(row), True)
+        else:
+            key = (tuple(row[:-1]), False)
+        i = self.index.get(key)
+        if i is None:
+            self.index[key] = self.append(row, rel, history)
+        elif rel is not Relation.EQ and (row[-1], rel) > (self.rows[i][-1], self.rels[i]):
+            self.replace(i, row, rel, history)
+
+    def add_bound(self, j: int, row: Row, rel: Relation, history: int) -> None:
+        upper = row[j] > 0
+        i = self.intervals.get((j, upper))
+        if i is None:
+            self.intervals[(j, upper)] = self.append(row, rel, history)
+        elif stronger(bound(row, j, rel), bound(self.rows[i], j, self.rels[i]), upper):
+            self.replace(i, row, rel, history)
+        else:
+            return
+
+        k = self.intervals.get((j, not upper))
+        if k is None:
+            return
+        (lo, hi) = (k, self.intervals[(j, upper)]) if upper else (self.intervals[(j, upper)], k)
+        ((lv, ls), (uv, us)) = (bound(self.rows[lo], j, self.rels[lo]), bound(self.rows[hi], j, self.rels[hi]))
+        if lv > uv or (lv == uv and (ls or us)):
+            # The interval is empty.
+            (lrow, urow) = (self.rows[lo], self.rows[hi])
+            h = self.history[lo] | self.history[hi] if self.history is not None else 0
+            self.add(
+                [urow[j] * p - lrow[j] * q for (p, q) in zip(lrow, urow)],
+                max(self.rels[lo], self.rels[hi]),
+                h,
+            )
+
+
+def linear_row(atom: Atom, index: dict[Symbol, int]) -> tuple[Row, Relation]:
+    """
+    Converts atom into a row with respect to the columns given by index.
+    """
+    return row_of(linear_terms(atom), index)
+
+
+def row_of(terms: Terms, index: dict[Symbol, int]) -> tuple[Row, Relation]:
+    (coefficients, constant, rel) = terms
+    row = [0] * (len(index) + 1)
+    for (x, a) in coefficients.items():
+        row[index[x]] = a
+    row[-1] = constant
+    return (row, rel)
+
+
+def linear_terms(atom: Atom) -> Terms:
+    """
+    Converts atom into the integer coefficients of its variables, its
+    constant and its relation, independently of any columns.
+
+    >>> from sympy.abc import x
+    >>> linear_terms(Ge(x / 2, 1))
+    ({x: -1}, 2, <Relation.LE: 1>)
+    """
+    if not isinstance(atom, Atom):
+        raise NotImplementedError("unknown relation of type " + str(type(atom)))
+
+    lhs = atom.args[0] - atom.args[1]
+    terms = lhs.as_coefficients_dict()
+    if not all(isinstance(m, Symbol) or m == 1 for m in terms):
+        terms = lhs.expand().as_coefficients_dict()
+        if not all(isinstance(m, Symbol) or m == 1 for m in terms):
+            raise NotImplementedError("atom is not linear: " + str(atom))
+    if not all(isinstance(c, Rational) for c in terms.values()):
+        raise NotImplementedError("coefficients must be rational: " + str(atom))
+
+    scale = lcm(*(c.q for c in terms.values()))
+    sign = -1 if isinstance(atom, Ge | Gt) else 1
+    (coefficients, constant) = ({}, 0)
+    for m, c in terms.items():
+        if m == 1:
+            constant = sign * int(c * scale)
+        else:
+            coefficients[m] = sign * int(c * scale)
+
+    if isinstance(atom, Eq):
+        return (coefficients, constant, Relation.EQ)
+    elif isinstance(atom, Le | Ge):
+        return (coefficients, constant, Relation.LE)
+    else:
+        return (coefficients, constant, Relation.LT)
+
+
+class System:
+    def __init__(
+        self,
+        variables: list[Symbol],
+        rows: list[Row],
+        rels: list[Relation],
+        history: Optional[list[int]] = None,
+        origins: Optional[list[int]] = None,
+        eliminated: int = 0,
+        intervals: Optional[dict[tuple[int, bool], int]] = None,
+    ) -> None:
+        assert len(rows) == len(rels)
+        self.variables = variables
+        self.index = {v: j for (j, v) in enumerate(variables)}
+        self.rows = rows
+        self.rels = rels
+
+        # If history is not None, history[i] is the set of original rows that
+        # rows[i] was derived from, as a bitset. origins[k] is the support of
+        # original row k, and eliminated is the set of variables that were
+        # eliminated explicitly by Fourier-Motzkin, both as bitsets.
+        assert history is None or len(history) == len(rows)
+        self.history = history
+        self.origins = origins
+        self.eliminated = eliminated
+
+        # If intervals is not None, the system comes from Rows, and
+        # intervals[(j, upper)] is the position of the only lower (upper)
+        # bound with just the variable at column j, see Rows.intervals.
+        self.intervals = intervals
+
+    @classmethod
+    def of(cls, atoms: Iterable[Atom], variables: Optional[list[Symbol]] = None) -> "System":
+        atoms = list(atoms)
+        if variables is None:
+            variables = sorted(
+                set().union(*(a.get_vars().free for a in atoms)),
+                key=lambda x: x.sort_key(),
+            )
+        index = {v: j for (j, v) in enumerate(variables)}
+        (rows, rels) = ([], [])
+        for a in atoms:
+            (row, rel) = linear_row(a, index)
+            rows.append(row)
+            rels.append(rel)
+        return cls(variables, rows, rels)
+
+    @classmethod
+    def of_terms(cls, terms: Iterable[Terms], variables: Optional[list[Symbol]] = None) -> "System":
+        """
+        Like of, but for atoms converted by linear_terms already.
+        """
+        terms = list(terms)
+        if variables is None:
+            variables = sorted(set().union(*(t[0] for t in terms)), key=lambda x: x.sort_key())
+        index = {v: j for (j, v) in enumerate(variables)}
+        (rows, rels) = ([], [])
+        for t in terms:
+            (row, rel) = row_of(t, index)
+            rows.append(row)
+            rels.append(rel)
+        return cls(variables, rows, rels)
+
+    @classmethod
+    def false(cls, variables: list[Symbol]) -> "System":
+        """
+        Returns the system with the single row 1 ≤ 0.
+        """
+        return cls(variables, [[0] * len(variables) + [1]], [Relation.LE])
+
+    def tracked(self) -> "System":
+        """
+        Returns a copy of this system that considers its rows as original rows
+        and tracks the history of all rows derived from them.
+        """
+        return System(
+            self.variables,
+            self.rows,
+            self.rels,
+            history=[1 << i for i in range(len(self.rows))],
+            origins=[support(row) for row in self.rows],
+            intervals=self.intervals,
+        )
+
+    def redundant(self, row: Row, history: int, eliminated: int) -> bool:
+        """
+        Decides whether a row derived from the original rows in history is
+        redundant, after the variables in eliminated have been eliminated
+        explicitly.
+
+        Chernikov's criterion states that after eliminating k variables, a row
+        derived from more than k + 1 original rows is redundant. Kohler
+        refines k to the number of eliminated variables that actually occur in
+        the original rows of the history, and Imbert's first acceleration
+        theorem adds the variables that were eliminated implicitly, i.e. occur
+        in the original rows but cancelled out in row.
+        """
+        assert self.origins is not None
+        occurring = 0
+        h = history
+        while h:
+            k = (h & -h).bit_length() - 1
+            occurring |= self.origins[k]
+            h &= h - 1
+        effective = occurring & eliminated
+        implicit = occurring & ~eliminated & ~support(row)
+        return history.bit_count() > 1 + effective.bit_count() + implicit.bit_count()
+
+    def eliminate_equations(self, xs: Iterable[Symbol]) -> tuple["System", list[Symbol]]:
+        """
+        Uses all equations at once to eliminate as many of xs as possible.
+        Returns the resulting system together with the eliminated variables.
+
+        The equations are reduced by fraction-free Gaussian elimination due to
+        Bareiss, where the entries after each step are exactly divisible by
+        the previous pivot, which keeps coefficients small. Rows that do not
+        contain the pivot variable are not touched; instead each row remembers
+        the pivot that was current when it was last updated, and the division
+        uses that, which is still exact. Pivots are chosen among xs by the
+        Markowitz criterion over all rows, which limits fill-in, breaking ties
+        in favor of the smallest absolute coefficient. Each pivot row is
+        substituted into the inequalities as in eliminate().
+
+        >>> from sympy.abc import x, y, z
+        >>> s = System([x, y, z], [[1, 1, 0, -2], [0, 2, -1, 0], [1, 0, 1, -4]],
+        ...            [Relation.EQ, Relation.EQ, Relation.LE])
+        >>> (r, solved) = s.eliminate_equations([x, y])
+        >>> (r.rows, r.rels, solved)
+        ([[0, 0, 1, -4]], [<Relation.LE: 1>], [x, y])
+        """
+        columns = [self.index[x] for x in xs if x in self.index]
+        # For each equation i, rows[i] * pivot / divisor[i] is the current row
+        # of the Bareiss elimination.
+        equations: dict[int, tuple[Row, int]] = {}
+        inequalities: dict[int, Row] = {}
+        for (i, (row, rel)) in enumerate(zip(self.rows, self.rels)):
+            if rel is Relation.EQ:
+                equations[i] = (row, 1)
+            else:
+                inequalities[i] = row
+
+        pivot = 1
+        solved = []
+        while True:
+            occurrences = {
+                j: sum(1 for (row, _) in equations.values() if row[j])
+                + sum(1 for row in inequalities.values() if row[j])
+                for j in columns
+            }
+            best = None
+            for (i, (row, _)) in equations.items():
+                n = sum(1 for a in row[:-1] if a)
+                for j in columns:
+                    if row[j]:
+                        key = ((n - 1) * (occurrences[j] - 1), abs(row[j]))
+                        if best is None or key < best[0]:
+                            best = (key, i, j)
+            if best is None:
+                break
+
+            (_, r, j) = best
+            (row, divisor) = equations.pop(r)
+            e = [a * pivot // divisor for a in row]
+            p = e[j]
+            for (i, (row, divisor)) in equations.items():
+                if row[j]:
+                    b = row[j]
+                    new = []
+                    for (a, c) in zip(row, e):
+                        (q, m) = divmod(p * a - b * c, divisor)
+                        assert m == 0
+                        new.append(q)
+                    equations[i] = (new, p)
+            s = 1 if p > 0 else -1
+            for (i, row) in inequalities.items():
+                if row[j]:
+                    b = row[j]
+                    inequalities[i] = primitive([abs(p) * a - s * b * c for (a, c) in zip(row, e)])
+            pivot = p
+            columns.remove(j)
+            solved.append(self.variables[j])
+
+        (rows, rels) = ([], [])
+        for i in range(len(self.rows)):
+            if i in inequalities:
+                rows.append(inequalities[i])
+                rels.append(self.rels[i])
+            elif i in equations:
+                (row, divisor) = equations[i]
+                row = primitive([a * pivot // divisor for a in row])
+                if any(row):
+                    rows.append(row)
+                    rels.append(Relation.EQ)
+        return (System(self.variables, rows, rels), solved)
+
+    def cost(self, x: Symbol) -> tuple[int, int]:
+        """
+        Estimates the cost of eliminating x. Variables with an equation come
+        first, since they are eliminated by substitution without any growth.
+        The others are ranked by the growth |lower|·|upper| - |lower| - |upper|
+        in the number of rows due to Fourier-Motzkin elimination.
+
+        >>> from sympy.abc import x, y
+        >>> s = System([x, y], [[1, -1, 0], [-1, 0, 2], [0, 1, -1]],
+        ...            [Relation.LE, Relation.LT, Relation.EQ])
+        >>> (s.cost(x), s.cost(y))
+        ((1, -1), (0, 0))
+        """
+        j = self.index.get(x)
+        if j is None:
+            return (0, 0)
+        (lower, upper) = (0, 0)
+        for (row, rel) in zip(self.rows, self.rels):
+            if not row[j]:
+                continue
+            elif rel is Relation.EQ:
+                return (0, 0)
+            elif row[j] < 0:
+                lower += 1
+            else:
+                upper += 1
+        return (1, lower * upper - lower - upper)
+
+    def feasible(self) -> bool:
+        return feasible(self.rows, self.rels)
+
+    def irredundant(self) -> Optional["System"]:
+        """
+        Returns an equivalent system without inequalities that are implied by
+        the other rows, or None if this system is infeasible. Each test is an
+        exact linear program, see theories.simplex. Equations are kept.
+
+        >>> from sympy.abc import x, y
+        >>> s = System([x, y], [[1, 0, -1], [1, 0, -2], [1, 1, 0], [0, -1, 0]],  # x + y < 0 ≤ y
+        ...            [Relation.LE, Relation.LE, Relation.LT, Relation.LE])
+        >>> s.irredundant().rows
+        [[1, 1, 0], [0, -1, 0]]
+        """
+        if not self.feasible():
+            return None
+        keep = list(range(len(self.rows)))
+        for i in range(len(self.rows)):
+            if self.rels[i] is Relation.EQ:
+                continue
+            others = [k for k in keep if k != i]
+            if implied(
+                [self.rows[k] for k in others],
+                [self.rels[k] for k in others],
+                self.rows[i],
+                self.rels[i],
+            ):
+                keep = others
+        return System(self.variables, [self.rows[i] for i in keep], [self.rels[i] for i in keep])
+
+    def expr(self, row: Row) -> Expr:
+        return Add(*(Integer(a) * v for (a, v) in zip(row, self.variables) if a), Integer(row[-1]))
+
+    def atoms(self) -> list[Eq | Le | Lt]:
+        return [rel.func(self.expr(row), 0) for (row, rel) in zip(self.rows, self.rels)]
+
+    def to_formula(self) -> Formula:
+        # Ground rows are evaluated rather than turned into atoms.
+        ground = [not any(row[:-1]) for row in self.rows]
+        if any(g and not holds(row[-1], rel) for (g, row, rel) in zip(ground, self.rows, self.rels)):
+            return F
+        atoms = [rel.func(self.expr(row), 0) for (g, row, rel) in zip(ground, self.rows, self.rels) if not g]
+        if not atoms:
+            return T
+        elif len(atoms) == 1:
+            return atoms[0]
+        else:
+            return And(*atoms)
+
+    def substitutions(self, j: int, pivot: int, rows: list[int]) -> Iterator[tuple[Row, Relation]]:
+        """
+        Generates the rows obtained by substituting the variable at column j
+        in rows, using the equation pivot a·x + e = 0. For a row b·x + r ρ 0
+        this gives |a|·r - sgn(a)·b·e ρ 0, where the factor |a| is positive and
+        thus preserves ρ.
+        """
+        e = self.rows[pivot]
+        a = e[j]
+        s = 1 if a > 0 else -1
+        for i in rows:
+            row = self.rows[i]
+            b = row[j]
+            yield ([abs(a) * r - s * b * c for (r, c) in zip(row, e)], self.rels[i])
+
+    def combinations(
+        self, j: int, lower: list[int], upper: list[int], eliminated: int
+    ) -> Iterator[tuple[Row, Relation, int]]:
+        """
+        Generates the combinations of the lower and upper bounds on the
+        variable at column j, together with their histories. If this system
+        tracks histories, redundant combinations are skipped.
+        """
+        for lo in lower:
+            (lrow, lrel) = (self.rows[lo], self.rels[lo])
+            for hi in upper:
+                (urow, urel) = (self.rows[hi], self.rels[hi])
+                (lm, um) = (urow[j], -lrow[j])
+                row = [lm * p + um * q for (p, q) in zip(lrow, urow)]
+                h = 0
+                if self.history is not None:
+                    h = self.history[lo] | self.history[hi]
+                    if self.redundant(row, h, eliminated):
+                        continue
+                yield (row, max(lrel, urel), h)
+
+    def eliminate(self, x: Symbol) -> "System":
+        """
+        Returns a system equivalent to ∃x. self that does not contain x.
+
+        If there is an equation for x, it is used to substitute x in all other
+        rows. Otherwise Fourier-Motzkin elimination combines every lower with
+        every upper bound on x. Rows of the form a·x + r ρ 0 are lower bounds
+        if a < 0 and upper bounds if a > 0.
+
+        New rows are generated one at a time and normalized as they go into
+        Rows, so ground tautologies are dropped at once. As soon as a ground
+        contradiction comes up, the result is System.false() and no further
+        rows are generated.
+
+        If this system tracks histories, redundant combinations are discarded
+        as described in redundant(). Among the remaining rows, a row is also
+        discarded if its history is a proper superset of the history of
+        another row (Imbert's third acceleration theorem).
+
+        >>> from sympy.abc import x, y
+        >>> s = System([x, y], [[-1, 0, 0], [1, 0, 0], [0, 1, 0], [0, -1, 1]],
+        ...            [Relation.LE, Relation.LT, Relation.LE, Relation.LE])
+        >>> s.eliminate(x).rows  # x ≥ 0, x < 0, y ≤ 0, y ≥ 1
+        [[0, 0, 1]]
+
+        Single-variable bounds of the result are kept as intervals, see Rows.
+        If x has only such bounds, they are combined directly.
+
+        >>> s = System([x, y], [[-1, 1, 0], [0, 1, -1], [0, -1, 0], [1, 0, -3]],
+        ...            [Relation.LE] * 4)  # y ≤ x, y ≤ 1, y ≥ 0, x ≤ 3
+        >>> t = s.eliminate(x)
+        >>> (t.rows, t.intervals)
+        ([[0, 1, -1], [0, -1, 0]], {(1, True): 0, (1, False): 1})
+        >>> t.eliminate(y).rows
+        []
+        """
+        j = self.index.get(x)
+        if j is None:
+            return self
+
+        result = Rows(self.history is not None)
+        (lower, upper) = ([], [])
+        pivot = None
+        for (i, (row, rel)) in enumerate(zip(self.rows, self.rels)):
+            if not row[j]:
+                result.add(row, rel, self.history[i] if self.history is not None else 0)
+            elif rel is Relation.EQ and pivot is None:
+                pivot = i
+            else:
+                (lower if row[j] < 0 else upper).append(i)
+        if result.contradiction:
+            return System.false(self.variables)
+
+        if pivot is not None:
+            for (row, rel) in self.substitutions(j, pivot, lower + upper):
+                result.add(row, rel)
+                if result.contradiction:
+                    return System.false(self.variables)
+            if self.history is not None:
+                # The substitution yields an inequality system in fewer
+                # variables, whose rows are taken as new original rows.
+                return System(self.variables, result.rows, result.rels, intervals=result.intervals).tracked()
+            return System(self.variables, result.rows, result.rels, intervals=result.intervals)
+
+        eliminated = self.eliminated | (1 << j)
+
+        bounds = [(j, u) in self.intervals for u in (False, True)] if self.intervals is not None else None
+        if bounds is not None and len(lower) + len(upper) == sum(bounds):
+            # x has only interval bounds, i.e. at most one lower and one upper
+            # bound, which Rows has picked already. Their combination is the
+            # ground row that decides whether the interval is empty.
+            if all(bounds):
+                assert self.intervals is not None
+                (lo, hi) = (self.intervals[(j, False)], self.intervals[(j, True)])
+                (lrow, urow) = (self.rows[lo], self.rows[hi])
+                h = self.history[lo] | self.history[hi] if self.history is not None else 0
+                result.add([urow[j] * p - lrow[j] * q for (p, q) in zip(lrow, urow)], max(self.rels[lo], self.rels[hi]), h)
+        else:
+            # Blow up exponentially!
+            for (row, rel, h) in self.combinations(j, lower, upper, eliminated):
+                result.add(row, rel, h)
+                if result.contradiction:
+                    break
+        if result.contradiction:
+            return System.false(self.variables)
+
+        if self.history is None:
+            return System(self.variables, result.rows, result.rels, intervals=result.intervals)
+
+        history = result.history
+        assert history is not None
+        keep = [i for (i, h) in enumerate(history) if not any(g != h and g & h == g for g in history)]
+        position = {i: k for (k, i) in enumerate(keep)}
+        return System(
+            self.variables,
+            [result.rows[i] for i in keep],
+            [result.rels[i] for i in keep],
+            history=[history[i] for i in keep],
+            origins=self.origins,
+            eliminated=eliminated,
+            intervals={key: position[i] for (key, i) in result.intervals.items() if i in position},
+        )
@@ -1,111 +1,241 @@
-import logging
-from itertools import product
+from time import perf_counter
+from typing import Callable, Iterable, Optional
 
-from logic1.atomlib.sympy import Eq, Ge, Gt, Le, Lt
-from logic1.firstorder.formula import And, Formula
-from logic1.firstorder.truth import T
+from logic1.atomlib.sympy import Eq
+from logic1.firstorder.formula import And, Formula, Or
+from logic1.firstorder.truth import F
 from sympy import Symbol
 
 from ..abc.qe import QuantifierElimination as Base
-from ..bound import Bound
-from ..util import conjunctive
-from .rings import Simplifier, poly
+from ..util import Memo, conjunctive
+from .linear import Atom, System, Terms, linear_terms
+from .rings import Simplifier
+from .simplex import Oracle
+from .vs import virtual_substitution
+
+
+def terms_of(a: Formula) -> Optional[Terms]:
+    # Returns linear_terms(a), or None if a is not a linear atom.
+    if not isinstance(a, Atom):
+        return None
+    try:
+        return linear_terms(a)
+    except NotImplementedError:
+        return None
+
+
+class Reducer:
+    """
+    Removes inequalities that are implied by the other linear atoms of a
+    conjunction, using exact linear programming. Other literals are kept as
+    they are. Formulas that are not conjunctions are returned unchanged.
+
+    Results are cached per set of rows, so that recurring conjunctions are
+    reduced only once. terms converts a literal into rows as terms_of does,
+    e.g. via the cache of QuantifierElimination.linear_terms, and cache is
+    the number of results kept.
+    """
+
+    def __init__(self, terms: Callable[[Formula], Optional[Terms]] = terms_of, cache: int = 1024) -> None:
+        self.terms = terms
+        self.cache: Memo[Optional[frozenset]] = Memo(cache)
+
+    def __call__(self, φ: Formula) -> Formula:
+        literals = φ.args if isinstance(φ, And) else (φ,)
+        (linear, other) = ([], [])
+        for a in literals:
+            t = self.terms(a)
+            if t is None:
+                other.append(a)
+            else:
+                linear.append((a, t))
+        if len(linear) < 2:
+            return φ
 
-Atom = Le | Lt | Ge | Gt | Eq
+        s = System.of_terms(t for (_, t) in linear)
+        rows = [(tuple(row), rel) for (row, rel) in zip(s.rows, s.rels)]
 
+        def reduce() -> Optional[frozenset]:
+            r = s.irredundant()
+            return None if r is None else frozenset(zip(map(tuple, r.rows), r.rels))
 
-def combine_op(
-    lower: Le | Lt | Eq, upper: Le | Lt | Eq
-) -> type[Le | Lt | Eq]:
-    if isinstance(lower, Le) and isinstance(upper, Le):
-        return Le
-    elif isinstance(lower, Lt | Le) and isinstance(upper, Lt | Le):
-        return Lt
-    elif isinstance(lower, Eq):
-        return type(upper)
-    elif isinstance(upper, Eq):
-        return type(lower)
-    else:
-        raise NotImplementedError()
+        keep = self.cache.lookup((tuple(s.variables), frozenset(rows)), reduce)
+        if keep is None:
+            return F
+        kept = [a for ((a, _), row) in zip(linear, rows) if row in keep] + other
+        return kept[0] if len(kept) == 1 else And(*kept)
 
 
 class QuantifierElimination(Base[Symbol]):
-    def __init__(self):
-        super().__init__(simplify=Simplifier())
+    def __init__(
+        self,
+        prune: bool = False,
+        lp: bool = False,
+        engine: str = "fm",
+        oracle: bool = False,
+        **kwargs,
+    ):
+        # The attributes of this class are set before calling the base class,
+        # whose __init__ may already call estimate, e.g. for the jobs in pool.
+
+        # If prune is set, all variables of a job are eliminated on one
+        # System that tracks row histories, so that redundant combinations are
+        # discarded, see System.redundant. This bypasses qe1p and self.memo,
+        # and is thus specific to Fourier-Motzkin elimination.
+        self.prune = prune
+        # engine selects how qe1p eliminates a variable: "fm" for
+        # Fourier-Motzkin elimination, "vs" for virtual substitution, see
+        # theories/vs.py.
+        if engine not in ("fm", "vs"):
+            raise ValueError("unknown engine " + repr(engine))
+        if prune and engine != "fm":
+            raise ValueError("prune requires engine 'fm'")
+        self.engine = engine
+        # If oracle is set, process_pool checks the feasibility of jobs with
+        # an exact simplex, see feasible and Oracle.
+        self.oracle = Oracle() if oracle else None
+        # self.terms caches the conversion of atoms by their interned ids, so
+        # that each atom is converted from sympy once, however often estimate,
+        # select and qe1p look at it. None marks atoms that are not linear.
+        self.terms: Memo[Optional[Terms]] = Memo(4096)
+        # If lp is set, atoms that are implied by the others are removed after
+        # each elimination step, see Reducer. Further keyword arguments, e.g.
+        # workers, memo and lazy, are passed on to the base class.
+        super().__init__(simplify=Simplifier(), reduce=Reducer(self.linear_terms) if lp else None, **kwargs)
 
     def qe1p(self, x: Symbol, φ: Formula) -> Formula:
         if x not in φ.get_vars().free:
             return φ
 
-        upper: list[Atom] = []
-        lower: list[Atom] = []
-        both: list[Atom] = []
-
-        for row in conjunctive(φ):
-            if not isinstance(row, Atom):
-                raise NotImplementedError("unknown relation of type " + str(type(row)))
-            elif row.args[1] != 0:
-                raise NotImplementedError("rhs must be zero")
-
-            b = Bound.of(row, x)
-            logging.debug(str(row) + " is " + str(b) + " for " + str(x))
-            if b == Bound.BOTH:
-                both.append(row)
-            else:
-                (upper if b == Bound.UPPER else lower).append(row)
-
-        logging.debug(
-            "(upper, lower, both) = " + str((upper, lower, both))
+        # The conjunction is converted to an integer matrix once, x is
+        # eliminated on that matrix, and only the result is converted back to
+        # atoms. See theories/linear.py.
+        s = self.system(conjunctive(φ))
+        if self.engine == "vs":
+            disjuncts = [d.to_formula() for d in virtual_substitution(s, x)]
+            return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+        return s.eliminate(x).to_formula()
+
+    def qep(self, variables: list[Symbol], φ: Formula) -> Optional[Formula]:
+        literals = φ.args if isinstance(φ, And) else (φ,)
+        if not self.prune and not any(isinstance(a, Eq) for a in literals):
+            return None
+
+        (hasx, other) = ([], [])
+        for a in literals:
+            (hasx if a.get_vars().free.intersection(variables) else other).append(a)
+        # Literals with variables that are not atoms, e.g. negated atoms, are
+        # left to qe1p.
+        if not all(isinstance(a, Atom) for a in hasx):
+            return None
+
+        # Before any inequality work, all equations are used at once to
+        # eliminate whatever variables can be solved for.
+        (s, solved) = self.system(hasx).eliminate_equations(variables)
+        for x in solved:
+            variables.remove(x)
+
+        if self.prune:
+            s = s.tracked()
+            while variables:
+                x = min(variables, key=s.cost)
+                variables.remove(x)
+                start = perf_counter()
+                s = s.eliminate(x)
+                # Each step counts as a call of qe1p, which it replaces.
+                if self.stats is not None:
+                    self.stats.qe1p_calls += 1
+                    self.stats.qe1p_time += perf_counter() - start
+        elif not solved:
+            return None
+
+        return And(s.to_formula(), *other)
+
+    def feasible(self, φ: Formula) -> Optional[bool]:
+        if self.oracle is None:
+            return None
+        try:
+            atoms = conjunctive(φ)
+        except ValueError:
+            return None
+        if not all(isinstance(a, Atom) for a in atoms):
+            return None
+
+        try:
+            s = self.system(atoms)
+        except NotImplementedError:
+            return None
+        return self.oracle.check(
+            (frozenset((x, a) for (x, a) in zip(s.variables, row) if a), row[-1], int(rel))
+            for (row, rel) in zip(s.rows, s.rels)
         )
 
-        result: list[Atom] = []
-
-        if not both and (not upper or not lower):
-            return T
-        elif both:
-            # There is at least one equation for x,
-            # so we can use it to substitute x in
-            # all other rows.
-            e = poly(both[0])
-            a = e.coeff_monomial(x)
-            e = e - (a * x).as_poly()
-            for row in lower + upper + both[1:]:
-                p = poly(row)
-                b = p.coeff_monomial(x)
-                p = (p - (b * x).as_poly()) * a
-                p = p + (-b * e)
-                result.append((row.func)(p.as_expr(), 0))
-            return And(*result)
-        else:
-            # Blow up exponentially!
-            for (loweri, upperi) in product(lower, upper):
-                logging.debug(
-                    "Combining lower bound "
-                    + str(loweri)
-                    + " and upper bound "
-                    + str(upperi)
-                )
-                (lo, uo) = (loweri.func, upperi.func)
-                (lp, up) = (poly(loweri), poly(upperi))
-                if isinstance(loweri, Ge | Gt):
-                    lp *= -1
-                    lo = lo.converse_func
-                if isinstance(upperi, Ge | Gt):
-                    up *= -1
-                    uo = uo.converse_func
-                
-                assert isinstance(lo, Le | Lt | Eq)
-                assert isinstance(uo, Le | Lt | Eq)
-
-                (lps, ups) = (
-                    lp.mul_ground(up.coeff_monomial(x)),
-                    up.mul_ground(abs(lp.coeff_monomial(x))),
-                )
-                combo = (combine_op(lo, uo))(lps.add(ups).as_expr(), 0)
-                logging.debug(combo)
-                result.append(combo)
-
-        return And(*result)
+    def linear(self, variables: list[Symbol], φ: Formula) -> Optional[System]:
+        # Returns the linear atoms of the conjunction φ that contain one of
+        # variables as a System, or None if there are none. Other literals,
+        # e.g. Ne or negated atoms, are left out.
+        literals = φ.args if isinstance(φ, And) else (φ,)
+        terms = [t for t in map(self.linear_terms, literals) if t is not None and not t[0].keys().isdisjoint(variables)]
+        return System.of_terms(terms) if terms else None
+
+    def system(self, atoms: Iterable[Formula]) -> System:
+        # Like System.of, via self.terms.
+        terms = list(map(self.linear_terms, atoms))
+        if None in terms:
+            raise NotImplementedError("not a conjunction of linear atoms")
+        return System.of_terms(terms)  # type: ignore
+
+    def linear_terms(self, a: Formula) -> Optional[Terms]:
+        # Returns terms_of(a) via self.terms.
+        return self.terms.lookup(self.interner.id(a), lambda: terms_of(a))
+
+    def select(self, variables: list[Symbol], φ: Formula) -> Optional[Symbol]:
+        # Prefer variables that can be eliminated using an equation, and
+        # otherwise the least Fourier-Motzkin growth, see System.cost.
+        # Variables that occur in linear atoms come first, the others are
+        # left to the base class.
+        s = self.linear(variables, φ)
+        if s is not None:
+            candidates = [x for x in variables if x in s.index and any(row[s.index[x]] for row in s.rows)]
+            if candidates:
+                return min(candidates, key=s.cost)
+        return super().select(variables, φ)
+
+    def caches(self) -> dict[str, tuple[int, int]]:
+        caches = super().caches()
+        if self.oracle is not None:
+            caches["oracle"] = (self.oracle.hits, self.oracle.misses)
+        return caches
+
+    def estimate(self, variables: list[Symbol], φ: Formula) -> tuple[int, tuple[int, int], int]:
+        # Jobs with fewer variables left come first, then those whose next
+        # elimination step is expected to create fewer rows, see System.cost,
+        # and then smaller jobs.
+        s = self.linear(variables, φ)
+        if s is None:
+            return (len(variables), (0, 0), 0)
+        blowup = min((s.cost(x) for x in variables if x in s.index), default=(0, 0))
+        return (len(variables), blowup, len(s.rows))
+
+    def worker(self) -> "QuantifierElimination":
+        # The caches of the copy start empty, and the reducer converts atoms
+        # via the cache of the copy instead of that of self.
+        worker = super().worker()
+        assert isinstance(worker, QuantifierElimination)
+        worker.terms = Memo(self.terms.capacity)
+        if isinstance(self.reduce, Reducer):
+            worker.reduce = Reducer(worker.linear_terms, self.reduce.cache.capacity)
+        if self.oracle is not None:
+            worker.oracle = Oracle(self.oracle.cache.capacity)
+        return worker
+
+    def clear(self) -> None:
+        super().clear()
+        self.terms.clear()
+        if isinstance(self.reduce, Reducer):
+            self.reduce.cache.clear()
+        if self.oracle is not None:
+            self.oracle.cache.clear()
 
 
 qe = QuantifierElimination().qe
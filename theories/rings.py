@@ -97,8 +97,10 @@ def poly(φ: BinaryAtomicFormula) -> Poly:
 
 
 class Simplifier(BaseSimplifier[Atom, Variable]):
-    def __init__(self, prefer: Preference = None) -> None:
-        super().__init__()
+    def __init__(
+        self, prefer: Preference = None, memo: int = 4096, polarity: bool = False, expand: Optional[int] = None
+    ) -> None:
+        super().__init__(memo=memo, polarity=polarity, expand=expand)
         self.prefer = prefer
 
     def merge(
@@ -166,6 +168,17 @@ class Simplifier(BaseSimplifier[Atom, Variable]):
         else:
             return None
 
+    def key(self, φ: Atom) -> tuple:
+        """
+        Only atoms with equal arguments are merged, see merge.
+
+        >>> from sympy.abc import x
+        >>> s = Simplifier()
+        >>> s.key(Lt(x, 1)) == s.key(Ge(x, 1))
+        True
+        """
+        return φ.args
+
     def atom(
         self,
         φ: Atom
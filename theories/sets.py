@@ -13,14 +13,14 @@ And(Ne(x, y), Ne(y, z))
 """
 
 from itertools import combinations
-from typing import Optional
+from typing import Hashable, Optional
 
 from logic1.atomlib.sympy import Eq, Ne, C, C_
 from logic1.firstorder.formula import And, Formula, Or
 from logic1.firstorder.truth import TruthValue, F
 from sympy import Symbol
 
-from ..util import conjunctive, encode, tuple_isinstance
+from ..util import conjunctive, conjunctive_core, encode, tuple_isinstance
 
 from ..abc.qe import QuantifierElimination as QuantifierEliminationBase
 from ..abc.simp import Simplifier as SimplifierBase
@@ -53,6 +53,11 @@ class Simplifier(SimplifierBase[Atom, Variable]):
                     return SimplifierBase.Merge.L if ctx is And else SimplifierBase.Merge.R
         return None
 
+    def key(self, φ: Atom) -> Hashable:
+        # Equality atoms are merged only with atoms of the same arguments, and
+        # cardinality atoms only with atoms of the same class.
+        return φ.func if isinstance(φ, CardinalityAtom) else φ.args
+
     def atom(self, φ: Atom) -> Atom | TruthValue:
         if isinstance(φ, CardinalityAtom):
             return φ
@@ -82,8 +87,9 @@ simplify = Simplifier()
 
 
 class QuantifierElimination(QuantifierEliminationBase[Variable]):
-    def __init__(self):
-        super().__init__(simplify=simplify)
+    def __init__(self, **kwargs):
+        # Keyword arguments are passed on to the base class.
+        super().__init__(simplify=simplify, **kwargs)
 
     def qe1p(self, x: Variable, φ: EqualityAtom) -> Formula:
         ys: set[Variable] = set()  # Variables that are   equal to x.
@@ -101,6 +107,19 @@ class QuantifierElimination(QuantifierEliminationBase[Variable]):
         else:
             return Or(*(And(self.eta(k, zs), C(k + 1)) for k in range(1, len(zs) + 1)))
 
+    def cost(self, x: Variable, φ: Formula) -> tuple[bool, int]:
+        # With an equation, qe1p substitutes. Otherwise it enumerates
+        # partitions of the variables unequal to x, so the number of Ne atoms
+        # containing x is what matters.
+        (eqs, nes) = (False, 0)
+        for a in conjunctive_core(φ):
+            if isinstance(a, EqualityAtom) and x in (a.lhs, a.rhs):
+                if isinstance(a, Eq):
+                    eqs = True
+                else:
+                    nes += 1
+        return (not eqs, nes)
+
     def eta(self, k: int, zs: set[Variable]) -> Formula:
         disj = []
         for choice in combinations(zs, k):
@@ -0,0 +1,259 @@
+"""
+Exact simplex method over the rationals.
+
+Everything is computed with fractions.Fraction, so results are exact and no
+external solver is needed. Pivoting follows Bland's rule, which avoids
+cycling.
+
+Rows are given as in theories.linear, i.e. a row [a₁, …, aₙ, c] together
+with a relation ρ stands for a₁x₁ + … + aₙxₙ + c ρ 0, where ρ is 0 for =,
+1 for ≤ and 2 for <.
+
+>>> feasible([[1, -1], [-1, 2]], [1, 1])  # x ≤ 1 and x ≥ 2
+False
+>>> feasible([[1, -1], [-1, 1]], [1, 1])  # x ≤ 1 and x ≥ 1
+True
+>>> feasible([[1, -1], [-1, 1]], [2, 1])  # x < 1 and x ≥ 1
+False
+>>> feasible([[1, 1, 0], [1, -1, 0], [-1, 0, 1]], [0, 2, 2])  # x = -y, x < y, x > 1
+False
+"""
+
+from fractions import Fraction
+from typing import Hashable, Iterable, Optional
+
+from ..util import Memo
+
+EQ = 0
+LE = 1
+LT = 2
+
+
+class Tableau:
+    """
+    Solves max d·y subject to M·y ≤ b (or = b for equations) and y ≥ 0.
+    """
+
+    def __init__(self, M: list[list[Fraction]], b: list[Fraction], eq: list[bool]) -> None:
+        m = len(M)
+        n = len(M[0]) if M else 0
+        slacks = [i for i in range(m) if not eq[i]]
+        # Columns are the original variables, one slack per inequality and
+        # one artificial variable per row. The last entry of each row of the
+        # tableau is its right hand side.
+        self.n = n
+        self.artificial = n + len(slacks)
+        width = self.artificial + m
+        self.T: list[list[Fraction]] = []
+        for i in range(m):
+            row = [Fraction(a) for a in M[i]] + [Fraction(0)] * (width - n) + [Fraction(b[i])]
+            if not eq[i]:
+                row[n + slacks.index(i)] = Fraction(1)
+            if row[-1] < 0:
+                row = [-a for a in row]
+            row[self.artificial + i] = Fraction(1)
+            self.T.append(row)
+        self.basis = [self.artificial + i for i in range(m)]
+
+    def pivot(self, r: int, j: int) -> None:
+        p = self.T[r][j]
+        pr = [a / p for a in self.T[r]]
+        self.T[r] = pr
+        for i, row in enumerate(self.T):
+            if i != r and row[j]:
+                f = row[j]
+                self.T[i] = [a - f * q for (a, q) in zip(row, pr)]
+        self.basis[r] = j
+
+    def optimize(self, d: list[Fraction], columns: int) -> Optional[Fraction]:
+        """
+        Maximizes d·y over the first columns columns, starting from the
+        current feasible basis. Returns None if the objective is unbounded.
+        """
+        while True:
+            cb = [d[k] if k < len(d) else 0 for k in self.basis]
+            entering = None
+            for j in range(columns):
+                rc = (d[j] if j < len(d) else 0) - sum(c * row[j] for (c, row) in zip(cb, self.T) if c)
+                if rc > 0:
+                    entering = j
+                    break
+            if entering is None:
+                return sum((c * row[-1] for (c, row) in zip(cb, self.T)), Fraction(0))
+            (leaving, best) = (None, Fraction(0))
+            for i, row in enumerate(self.T):
+                if row[entering] > 0:
+                    ratio = row[-1] / row[entering]
+                    if (
+                        leaving is None
+                        or ratio < best
+                        or (ratio == best and self.basis[i] < self.basis[leaving])
+                    ):
+                        (leaving, best) = (i, ratio)
+            if leaving is None:
+                return None
+            self.pivot(leaving, entering)
+
+    def solve(self, d: list[Fraction]) -> Optional[Fraction]:
+        """
+        Returns the maximum of d·y, or None if there is no feasible y. The
+        objective must be bounded on the feasible set.
+        """
+        width = len(self.T[0]) - 1 if self.T else 0
+        phase1 = [Fraction(0)] * self.artificial + [Fraction(-1)] * (width - self.artificial)
+        if self.optimize(phase1, width) != 0:
+            return None
+
+        # Drive artificial variables, which are all 0 now, out of the basis.
+        # If that is impossible, the row is linearly dependent on the others.
+        for r in reversed(range(len(self.T))):
+            if self.basis[r] >= self.artificial:
+                j = next((j for j in range(self.artificial) if self.T[r][j]), None)
+                if j is None:
+                    del self.T[r]
+                    del self.basis[r]
+                else:
+                    self.pivot(r, j)
+
+        value = self.optimize(d, self.artificial)
+        assert value is not None
+        return value
+
+    def values(self) -> list[Fraction]:
+        """
+        Returns the current basic solution restricted to the original
+        variables.
+        """
+        y = [Fraction(0)] * self.n
+        for (i, k) in enumerate(self.basis):
+            if k < self.n:
+                y[k] = self.T[i][-1]
+        return y
+
+
+def solution(rows: list[list[int]], rels: list[int]) -> Optional[list[Fraction]]:
+    """
+    Returns a real solution of the conjunction of rows, or None if there is
+    none.
+
+    Variables are free, so each is split as x = x⁺ - x⁻. Strict rows get an
+    additional variable t, i.e. a·x + c + t ≤ 0, and the system is feasible
+    iff the maximum of t subject to t ≤ 1 is positive.
+
+    >>> solution([[1, 1, -2], [1, -1, 0]], [0, 2])  # x + y = 2, x < y
+    [Fraction(1, 2), Fraction(3, 2)]
+    """
+    if not rows:
+        return []
+    n = len(rows[0]) - 1
+    strict = LT in rels
+    (M, b, eq) = ([], [], [])
+    for row, rel in zip(rows, rels):
+        a = row[:-1]
+        M.append(a + [-c for c in a] + ([1 if rel == LT else 0] if strict else []))
+        b.append(-row[-1])
+        eq.append(rel == EQ)
+    if strict:
+        M.append([0] * (2 * n) + [1])
+        b.append(1)
+        eq.append(False)
+        d = [Fraction(0)] * (2 * n) + [Fraction(1)]
+    else:
+        d = []
+    tableau = Tableau(M, b, eq)
+    value = tableau.solve(d)
+    if value is None or (strict and value <= 0):
+        return None
+    y = tableau.values()
+    return [p - q for (p, q) in zip(y[:n], y[n : 2 * n])]
+
+
+def feasible(rows: list[list[int]], rels: list[int]) -> bool:
+    """
+    Decides whether the conjunction of rows has a real solution.
+    """
+    return solution(rows, rels) is not None
+
+
+def implied(rows: list[list[int]], rels: list[int], row: list[int], rel: int) -> bool:
+    """
+    Decides whether the conjunction of rows implies row, i.e. whether rows
+    together with the negation of row are infeasible. Equations are not
+    negated, since their negation is not convex.
+
+    >>> implied([[1, -1], [1, -2]], [1, 1], [1, 0], 2)  # x ≤ 1, x ≤ 2 ⊨ x < 0?
+    False
+    >>> implied([[1, -1]], [1], [1, -2], 1)  # x ≤ 1 ⊨ x ≤ 2
+    True
+    >>> implied([[1, -1]], [1], [1, -1], 2)  # x ≤ 1 ⊨ x < 1?
+    False
+    """
+    assert rel != EQ
+    negated = [-a for a in row]
+    return not feasible(rows + [negated], rels + [LE if rel == LT else LT])
+
+
+# A row with named columns: coefficients by variable, constant and relation.
+SparseRow = tuple[frozenset[tuple[Hashable, int]], int, int]
+
+
+class Oracle:
+    """
+    Feasibility checks on sets of rows.
+
+    check() decides whether the given rows are feasible. Results are cached
+    by the set of rows, keeping at most cache of them. In addition, the
+    solution found last is tried on the rows before solving a linear
+    program. hits counts the checks answered without solving one.
+
+    >>> o = Oracle()
+    >>> a = (frozenset({('x', 1)}), -1, LE)  # x ≤ 1
+    >>> b = (frozenset({('x', -1)}), 0, LT)  # x > 0
+    >>> c = (frozenset({('x', -1)}), 1, LE)  # x ≥ 1
+    >>> d = (frozenset({('x', 1)}), -1, LT)  # x < 1
+    >>> [o.check(rows) for rows in ([a], [a, b], [a, b, c], [a, b, c, d], [a, b, c])]
+    [True, True, True, False, True]
+    >>> (o.hits, o.misses)
+    (3, 2)
+    """
+
+    def __init__(self, cache: int = 4096) -> None:
+        self.witness: dict[Hashable, Fraction] = {}
+        self.cache: Memo[bool] = Memo(cache)
+        # Number of cache misses that the witness answered.
+        self.witnessed = 0
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits + self.witnessed
+
+    @property
+    def misses(self) -> int:
+        return self.cache.misses - self.witnessed
+
+    def satisfied(self, row: SparseRow) -> bool:
+        (coeffs, c, rel) = row
+        v = sum((a * self.witness.get(x, 0) for (x, a) in coeffs), Fraction(c))
+        return v == 0 if rel == EQ else v <= 0 if rel == LE else v < 0
+
+    def check(self, rows: Iterable[SparseRow]) -> bool:
+        rows = list(rows)
+        return self.cache.lookup(frozenset(rows), lambda: self.solve(rows))
+
+    def solve(self, rows: list[SparseRow]) -> bool:
+        if all(self.satisfied(row) for row in rows):
+            self.witnessed += 1
+            return True
+        variables = list({x for (coeffs, _, _) in rows for (x, _) in coeffs})
+        index = {x: j for (j, x) in enumerate(variables)}
+        dense = []
+        for (coeffs, c, _) in rows:
+            row = [0] * (len(variables) + 1)
+            for (x, a) in coeffs:
+                row[index[x]] = a
+            row[-1] = c
+            dense.append(row)
+        point = solution(dense, [rel for (_, _, rel) in rows])
+        if point is not None:
+            self.witness = dict(zip(variables, point))
+        return point is not None
@@ -1,15 +1,24 @@
+import json
 import logging
+import multiprocessing
+import os
+import tempfile
+import time
 import unittest
 
-from logic1.atomlib.sympy import Eq, Ge, Gt, Lt
-from logic1.firstorder.boolean import And
+from logic1.atomlib.sympy import Eq, Ge, Gt, Le, Lt, Ne
+from logic1.firstorder.boolean import And, Not, Or
 from logic1.firstorder.formula import Formula
-from logic1.firstorder.quantified import Ex
+from logic1.firstorder.quantified import All, Ex
 from logic1.firstorder.truth import F, T
-from sympy.abc import x, y, z
+from sympy import Rational, Symbol
+from sympy.abc import u, v, w, x, y, z
 
+from ..abc import checkpoint
+from ..abc.qe import Finished, Pool
+from ..abc.trace import Setup, Step
 from ..util import closure, show_progress
-from .lra import qe
+from .lra import QuantifierElimination, Reducer, qe
 from .rings import Simplifier
 
 simplify_lt = Simplifier(prefer=Lt)
@@ -69,6 +78,342 @@ class FourierMotzkinTests(unittest.TestCase):
         # self.assertEqual(f, Ex(y, Eq(y - 9, 0)))
         self.assertEqual(qe(f), T)
 
+    def test_eq4(self):
+        # Eliminating y via Eq(x - y, 0) uses a negative pivot coefficient.
+        f = exsimp(Eq(x, y), Le(y, 1), Ge(x, 2))
+        self.assertEqual(qe(f), F)
+
+    def test_eq5(self):
+        f = exsimp(Eq(x + y, 2), Eq(2 * y, z), Le(x + z, 4), Gt(z, 4))
+        self.assertEqual(qe(f), F)
+        f = exsimp(Eq(x + y, 2), Eq(2 * y, z), Le(x + z, 4), Ge(z, 4))
+        self.assertEqual(qe(f), T)
+
+    def test_bounds(self):
+        f = exsimp(Ge(x, 0), Le(x - 40, 0), Ge(y, 3), Lt(y - x, 2), Lt(x, 1))
+        self.assertEqual(qe(f), F)
+        f = exsimp(Ge(x, 0), Le(x - 40, 0), Ge(y, 3), Lt(y - x, 2), Lt(x, 2))
+        self.assertEqual(qe(f), T)
+
+    def test_contradiction(self):
+        f = exsimp(Ge(x, y), Lt(x, y), Le(x + z, 1), Ge(x - z, 0))
+        self.assertEqual(qe(f), F)
+
+    def test_rational(self):
+        f = exsimp(Ge(x / 2, y), Gt(y, Rational(1, 3)), Lt(x, Rational(2, 3)))
+        self.assertEqual(qe(f), F)
+
+    def test_prune(self):
+        f = exsimp(
+            Ge(x + y + 2 * z, 1),
+            Ge(-x + y + z, 2),
+            Ge(x - y + z, 1),
+            Ge(-y - 3 * z, 0),
+        )
+        self.assertEqual(QuantifierElimination(prune=True).qe(f), F)
+        f = exsimp(Ge(x + y - 2 * z, 2), Ge(-x - 3 * y + z, 0), Ge(y + z, 1))
+        self.assertEqual(QuantifierElimination(prune=True).qe(f), T)
+        qe = QuantifierElimination(prune=True, stats=True)
+        qe(f)
+        assert qe.stats is not None
+        self.assertEqual(qe.stats.qe1p_calls, 3)
+        with self.assertRaises(ValueError):
+            QuantifierElimination(prune=True, engine="vs")
+
+    def test_lp(self):
+        f = exsimp(
+            Ge(x + y + 2 * z, 1),
+            Ge(-x + y + z, 2),
+            Ge(x - y + z, 1),
+            Ge(-y - 3 * z, 0),
+        )
+        self.assertEqual(QuantifierElimination(lp=True).qe(f), F)
+        f = exsimp(Ge(x + y - 2 * z, 2), Ge(-x - 3 * y + z, 0), Ge(y + z, 1))
+        self.assertEqual(QuantifierElimination(lp=True).qe(f), T)
+
+    def test_reducer(self):
+        r = Reducer()
+        self.assertEqual(r(And(Le(x - 1, 0), Le(x - 2, 0))), Le(x - 1, 0))
+        self.assertEqual(r(And(Le(x - 1, 0), Gt(x - 2, 0))), F)
+        self.assertEqual(len(r.cache.entries), 2)
+        # Other literals are kept, and do not prevent the reduction.
+        φ = And(Le(x - 1, 0), Le(x - 2, 0), Ne(y, 0), Ge(y * z, 0))
+        self.assertEqual(r(φ), And(Le(x - 1, 0), Ne(y, 0), Ge(y * z, 0)))
+        self.assertEqual(r(Or(Le(x - 1, 0), Le(x - 2, 0))), Or(Le(x - 1, 0), Le(x - 2, 0)))
+        f = Ex(x, And(Gt(x, 0), Lt(x, 1), Ge(y * z, 0)))
+        self.assertEqual(QuantifierElimination(lp=True).qe(f), QuantifierElimination().qe(f))
+
+
+class EngineTests(unittest.TestCase):
+    # Runs the same inputs through Fourier-Motzkin elimination and virtual
+    # substitution, side by side.
+    inputs = [
+        (exsimp(Ge(x + y - 2 * z, 2), Ge(-x - 3 * y + z, 0), Ge(y + z, 1)), T),
+        (exsimp(Ge(x + y + 2 * z, 1), Ge(-x + y + z, 2), Ge(x - y + z, 1), Ge(-y - 3 * z, 0)), F),
+        (exsimp(Ge(x, 1), Lt(y, 0), Gt(y, 0)), F),
+        (exsimp(Eq(x, y), Le(y, 1), Ge(x, 2)), F),
+        (exsimp(Gt(x, y), Lt(x, z), Gt(z, 1), Lt(y, 2)), T),
+    ]
+
+    def test_fm(self):
+        for (f, expected) in self.inputs:
+            self.assertEqual(QuantifierElimination(engine="fm").qe(f), expected)
+
+    def test_vs(self):
+        for (f, expected) in self.inputs:
+            self.assertEqual(QuantifierElimination(engine="vs").qe(f), expected)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            QuantifierElimination(engine="cad")
+
+
+class RecordingPool(Pool):
+    # Records the largest size of the pool, see DriverTests.test_lazy_parallel.
+    peak = 0
+
+    def append(self, job) -> None:
+        super().append(job)
+        self.peak = max(self.peak, len(self))
+
+
+class Interrupt(Exception):
+    # Raised by a subscriber to stop a run, see DriverTests.test_checkpoint.
+    pass
+
+
+class SlowQuantifierElimination(QuantifierElimination):
+    # Eliminating from a conjunction that contains z blocks until the file
+    # release exists in the directory marks, and then leaves a mark there,
+    # see DriverTests.test_cancel.
+    marks = ""
+
+    def qe1p(self, x: Symbol, φ: Formula) -> Formula:
+        if z in φ.get_vars().free:
+            while not os.path.exists(os.path.join(self.marks, "release")):
+                time.sleep(0.01)
+            open(os.path.join(self.marks, str(os.getpid())), "w").close()
+        return super().qe1p(x, φ)
+
+
+class DriverTests(unittest.TestCase):
+    # Tests the options of the driver in abc/qe.py, each on an input that
+    # shows its effect.
+    inputs = EngineTests.inputs
+
+    def test_options(self):
+        options: list[dict] = [{"oracle": True}, {"workers": 2}, {"lazy": True}, {"miniscope": True}]
+        for kwargs in options:
+            for (f, expected) in self.inputs:
+                self.assertEqual(QuantifierElimination(**kwargs).qe(f), expected, kwargs)
+
+    def test_oracle(self):
+        # The job is infeasible, which the simplifier does not see. The
+        # oracle drops it before any elimination step.
+        f = Ex(x, Ex(y, And(Gt(x + y, 2), Lt(x, 0), Lt(y, 0))))
+        qe = QuantifierElimination(oracle=True, stats=True)
+        self.assertEqual(qe(f), F)
+        assert qe.stats is not None
+        self.assertEqual(qe.stats.qe1p_calls, 0)
+        qe = QuantifierElimination(stats=True)
+        self.assertEqual(qe(f), F)
+        assert qe.stats is not None
+        self.assertGreater(qe.stats.qe1p_calls, 0)
+
+    def test_parallel(self):
+        f = exsimp(Gt(x, y), Lt(x, z))
+        self.assertEqual(QuantifierElimination(workers=2).qe(Or(f, exsimp(Ge(x, 1), Lt(x, 0)))), T)
+        # Jobs pushed by workers are counted, see test_lazy_parallel.
+        f = And(Gt(x, y), Gt(x, w), Lt(x, z), Lt(x, v))
+        qe = QuantifierElimination(engine="vs", workers=2, stats=True)
+        (qe.pool, qe.finished) = (Pool(qe.estimate, [([x, u], f)]), Finished(qe.interner))
+        self.assertIsNone(qe.process_pool())
+        assert qe.stats is not None
+        self.assertEqual((qe.stats.jobs, qe.stats.peak_pool), (2, 2))
+
+    def test_spawn(self):
+        # Spawned workers get a pickled copy of the driver, which must not
+        # carry the state of the coordinator, e.g. its cursors.
+        f = Ex(x, And(Or(Gt(x, y), Gt(x, z)), Or(Lt(x, 0), Lt(x, y + z))))
+        expected = QuantifierElimination().qe(f)
+        for kwargs in [{}, {"lp": True, "lazy": True}, {"oracle": True}]:
+            qe = QuantifierElimination(workers=2, context="spawn", **kwargs)
+            self.assertEqual(qe(f), expected, kwargs)
+
+    def test_cancel(self):
+        # The first job is equivalent to T. process_pool returns as soon as
+        # that is known, while the slow jobs are blocked, and the workers
+        # running them never finish.
+        with tempfile.TemporaryDirectory() as directory:
+            qe = SlowQuantifierElimination(workers=3)
+            qe.marks = directory
+            jobs = [([x], Gt(x, y)), ([x], And(Gt(x, z), Lt(x, 0))), ([x], And(Gt(x, 0), Lt(x, z)))]
+            (qe.pool, qe.finished) = (Pool(qe.estimate, jobs), Finished(qe.interner))
+            self.assertEqual(qe.process_pool(), ())
+            # Workers that are still running would now leave their marks
+            # before they exit.
+            open(os.path.join(directory, "release"), "w").close()
+            for process in multiprocessing.active_children():
+                process.join()
+            self.assertEqual(os.listdir(directory), ["release"])
+
+    def test_lazy(self):
+        # The DNF has 2⁶ disjuncts, none of them equivalent to T.
+        f = Ex(x, And(Gt(x, y), Lt(x, z), *(Or(Lt(x, z + i), Gt(x, y - i)) for i in range(1, 7))))
+        (pools, cursors) = ([], [])
+
+        def observe(event):
+            if isinstance(event, Step):
+                assert event.qe.pool is not None
+                pools.append(len(event.qe.pool))
+                cursors.append(len(event.qe.cursors))
+
+        lazy = QuantifierElimination(lazy=True, stats=True)
+        lazy.tracer.subscribe(observe)
+        eager = QuantifierElimination(stats=True)
+        lazy(f)
+        eager(f)
+        assert lazy.stats is not None and eager.stats is not None
+        # Disjuncts are taken from the cursor one at a time instead of being
+        # pushed to the pool.
+        self.assertEqual(len(pools), 2**6)
+        self.assertEqual(max(pools), 0)
+        self.assertTrue(all(n == 1 for n in cursors))
+        self.assertLessEqual(lazy.stats.peak_pool, 1)
+        self.assertGreater(eager.stats.peak_pool, 1)
+
+    def test_lazy_parallel(self):
+        # Virtual substitution eliminates x by a disjunction of two
+        # conjunctions, from which u is left to eliminate. In lazy mode, the
+        # worker sends it back as a cursor instead of two jobs.
+        f = And(Gt(x, y), Gt(x, w), Lt(x, z), Lt(x, v))
+        (peaks, results) = ([], [])
+        for lazy in (False, True):
+            qe = QuantifierElimination(engine="vs", workers=2, lazy=lazy)
+            pool = RecordingPool(qe.estimate, [([x, u], f)])
+            (qe.pool, qe.finished) = (pool, Finished(qe.interner))
+            self.assertIsNone(qe.process_pool())
+            peaks.append(pool.peak)
+            results.append(set(qe.finished))
+        self.assertEqual(peaks, [2, 1])
+        self.assertEqual(results[0], results[1])
+
+    def test_miniscope(self):
+        # Ex x and Ex y are eliminated from their own subformulas, one block
+        # each, instead of from the whole formula.
+        f = Ex(x, Ex(y, And(Gt(x, 0), Lt(x, z), Gt(y, z), Lt(y, 1))))
+        qe = QuantifierElimination(miniscope=True)
+        events: list = []
+        qe.tracer.subscribe(events.append)
+        self.assertEqual(qe(f), QuantifierElimination().qe(f))
+        setups = [e for e in events if isinstance(e, Setup)]
+        # The quantifier-free rest is set up last, with no blocks.
+        self.assertEqual(sorted(e.blocks for e in setups), [0, 1, 1])
+        f = All(y, Ex(x, And(Or(Gt(x, y), Lt(x, z)), Ge(z, 0))))
+        self.assertEqual(QuantifierElimination(miniscope=True).qe(Ex(z, f)), T)
+
+    def test_estimate(self):
+        qe = QuantifierElimination()
+        small = And(Gt(x, y), Lt(x, z))
+        large = And(Gt(x, y), Gt(x, z), Lt(x, 0), Lt(x, 1))
+        self.assertLess(qe.estimate([x], small), qe.estimate([x], large))
+        self.assertLess(qe.estimate([x], large), qe.estimate([x, y], small))
+        # Literals other than linear atoms are not converted.
+        self.assertEqual(qe.estimate([x], And(Ne(y, 0), Gt(x, 0))), (1, (1, -1), 1))
+        self.assertEqual(qe(Ex(x, And(Ne(y, 0), Gt(x, 0), Lt(x, 1)))), Ne(y, 0))
+        # Jobs given to the constructor are estimated right away.
+        qe = QuantifierElimination(pool=[([x], small), ([x], large)])
+        assert qe.pool is not None
+        self.assertEqual(list(qe.pool), [([x], small), ([x], large)])
+
+    def test_select(self):
+        qe = QuantifierElimination()
+        self.assertEqual(qe.select([x], And(Ne(y, 0), Gt(x, 0), Lt(x, 1))), x)
+        self.assertEqual(qe.select([x], And(Ne(x, 0), Gt(y, 0))), x)
+        self.assertEqual(qe.select([x], And(Ne(y, 0), Gt(y, 0))), None)
+
+    def test_qep(self):
+        # Equations are used even if there are negated atoms on parameters.
+        qe = QuantifierElimination()
+        variables = [x]
+        self.assertIsNotNone(qe.qep(variables, And(Eq(x, y), Gt(x, 0), Not(Gt(z, 0)))))
+        self.assertEqual(variables, [])
+        # Negated atoms with variables are left to qe1p.
+        self.assertIsNone(qe.qep([x], And(Eq(x, y), Not(Gt(x, z)))))
+
+    def test_memo(self):
+        # Both disjuncts share the conjunction of atoms containing x.
+        qe = QuantifierElimination()
+        qe(Ex(x, And(Gt(x, y), Lt(x, z), Or(Gt(y, 0), Lt(y, -1)))))
+        self.assertEqual((qe.memo.hits, qe.memo.misses), (1, 1))
+        qe = QuantifierElimination(memo=0)
+        qe(Ex(x, And(Gt(x, y), Lt(x, z), Or(Gt(y, 0), Lt(y, -1)))))
+        self.assertEqual(len(qe.memo.entries), 0)
+
+    def test_trace(self):
+        qe = QuantifierElimination()
+        events: list = []
+        qe.tracer.subscribe(events.append)
+        qe(self.inputs[1][0])
+        names = [type(e).__name__ for e in events]
+        self.assertEqual(names[:2], ["Setup", "PopBlock"])
+        self.assertIn("Step", names)
+        self.assertEqual(names[-1], "CollectFinished")
+        self.assertTrue(all(e.duration >= 0 for e in events))
+
+    def test_stats(self):
+        qe = QuantifierElimination(stats=True)
+        self.assertEqual(qe(self.inputs[1][0]), F)
+        assert qe.stats is not None
+        stats = qe.stats.as_dict()
+        self.assertEqual(len(stats["blocks"]), 1)
+        self.assertGreater(stats["qe1p_calls"], 0)
+        self.assertGreaterEqual(stats["jobs"], 1)
+        self.assertGreaterEqual(stats["steps"], 1)
+        self.assertLessEqual(stats["max_atoms"], stats["atoms"])
+        self.assertEqual(set(stats["hit_rates"]), {"qe1p", "simplify"})
+        json.loads(qe.stats.to_json())
+
+    def test_checkpoint(self):
+        # With interval 0, a checkpoint is saved after every job. None of the
+        # disjuncts of f is equivalent to T, so that all of them are run. The
+        # run is interrupted in the second step, and resumed from the
+        # checkpoint saved after the first job.
+        f = Ex(x, And(Or(Gt(x, y), Gt(x, z)), Or(Lt(x, 0), Lt(x, y + z))))
+        steps: list[Step] = []
+
+        def interrupt(event):
+            if isinstance(event, Step):
+                steps.append(event)
+                if len(steps) == 2:
+                    raise Interrupt()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "qe.ckpt")
+            for lazy in (False, True):
+                expected = QuantifierElimination(lazy=lazy).qe(f)
+                steps.clear()
+                qe = QuantifierElimination(checkpoint=path, interval=0, lazy=lazy)
+                qe.tracer.subscribe(interrupt)
+                with self.assertRaises(Interrupt):
+                    qe(f)
+                state = checkpoint.load(path)
+                self.assertEqual(len(state["finished"]), 1)
+                if lazy:
+                    # The cursor is saved instead of its remaining disjuncts.
+                    self.assertEqual(state["pool"], [])
+                    self.assertEqual([consumed for (_, _, consumed) in state["cursors"]], [1])
+                else:
+                    self.assertEqual(len(state["pool"]), 3)
+                resumed = QuantifierElimination(lazy=lazy)
+                self.assertEqual(resumed.resume(path), expected)
+                # The checkpoint is removed after the run completes, and
+                # later runs of the instance do not save one.
+                self.assertFalse(os.path.exists(path))
+                self.assertIsNone(resumed.checkpoint)
+                self.assertEqual(resumed.qe(f), expected)
+                self.assertFalse(os.path.exists(path))
+
 
 if __name__ == "__main__":
     unittest.main()
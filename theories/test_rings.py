@@ -0,0 +1,46 @@
+import unittest
+
+from logic1.atomlib.sympy import Ge, Gt, Le, Lt
+from logic1.firstorder.boolean import And, Equivalent, Not, Or
+from logic1.firstorder.formula import Formula
+from logic1.firstorder.quantified import All, Ex
+from sympy.abc import x, y, z
+
+from ..util import size
+from .rings import Simplifier
+
+
+class SimplifierTests(unittest.TestCase):
+    def test_memo(self):
+        s = Simplifier()
+        φ = Or(And(Ge(x, 0), Lt(x, 1)), And(Ge(y, 0), Lt(y, 1)))
+        s(And(φ, Or(φ, Gt(z, 0))))
+        self.assertGreater(s.memo.hits, 0)
+        # Results are shared between calls within a scope only.
+        s = Simplifier()
+        s(φ)
+        misses = s.memo.misses
+        s(φ)
+        self.assertEqual(s.memo.misses, 2 * misses)
+        with s.scope():
+            s(φ)
+            s(φ)
+            self.assertEqual(s.memo.misses, 3 * misses)
+        self.assertEqual(len(s.memo.entries), 0)
+
+    def test_polarity(self):
+        φ = Not(And(Or(Gt(x, y), Le(x, 0)), Not(Lt(y, z))))
+        self.assertEqual(Simplifier(polarity=True)(φ), Simplifier()(φ))
+        ψ = Not(Ex(x, Lt(x, y)))
+        self.assertEqual(Simplifier(polarity=True)(ψ), Simplifier()(ψ))
+        self.assertEqual(Simplifier()(ψ), All(x, Simplifier()(Ge(x, y))))
+
+    def test_expand(self):
+        φ: Formula = Lt(x, 0)
+        for i in range(1, 24):
+            φ = Equivalent(Lt(x, i), φ)
+        self.assertLess(size(Simplifier(expand=2)(φ)), 4 * 24)
+
+
+if __name__ == "__main__":
+    unittest.main()
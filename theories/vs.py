@@ -0,0 +1,92 @@
+"""
+Virtual substitution for linear real arithmetic after Loos and Weispfenning.
+
+Instead of combining every lower with every upper bound on x as
+Fourier-Motzkin elimination does, ∃x.φ is replaced by a disjunction of
+instances of φ, one for each test point in an elimination set. The
+elimination set consists of either all lower or all upper bounds on x,
+whichever set is smaller. A strict lower bound t is replaced by t + ε and a
+strict upper bound by t - ε, where ε is a positive infinitesimal. If there
+is no lower bound, −∞ is a test point that satisfies all constraints on x,
+and dually for +∞.
+
+Each disjunct has fewer rows than the input, so the output grows linearly
+in the number of bounds per step, at the price of a disjunction.
+
+>>> from sympy.abc import x, y
+>>> s = System([x, y], [[-1, 0, 0], [1, -1, 0], [1, 0, -2]],
+...            [Relation.LT, Relation.LE, Relation.LE])  # 0 < x ≤ y, x ≤ 2
+>>> [(d.rows, d.rels) for d in virtual_substitution(s, x)]
+[([[0, -1, 0], [0, 0, -1]], [<Relation.LT: 2>, <Relation.LT: 2>])]
+"""
+
+from sympy import Symbol
+
+from .linear import Relation, Row, System, primitive
+
+
+def substitute(row: Row, rel: Relation, bound: Row, j: int, ε: int) -> tuple[Row, Relation]:
+    """
+    Substitutes the zero t of bound for x in row, where bound has coefficient
+    a ≠ 0 at column j. ε is 0 for x = t, 1 for x = t + ε and -1 for x = t - ε.
+
+    With row = b·x + r, this computes |a|·(b·t + r), where t = -r_bound/a,
+    which is a positive multiple and thus has the same sign. The
+    infinitesimal contributes b·ε to b·x + r, so for ε ≠ 0 the resulting
+    relation is < if b·ε > 0 and ≤ if b·ε < 0.
+    """
+    a = bound[j]
+    b = row[j]
+    s = 1 if a > 0 else -1
+    result = primitive([abs(a) * q - s * b * p for (p, q) in zip(bound, row)])
+    if not ε or not b:
+        return (result, rel)
+    elif b * ε > 0:
+        return (result, Relation.LT)
+    else:
+        return (result, Relation.LE)
+
+
+def virtual_substitution(s: System, x: Symbol) -> list[System]:
+    """
+    Returns systems whose disjunction is equivalent to ∃x.s. Rows that do not
+    contain x occur in every system.
+    """
+    j = s.index.get(x)
+    if j is None:
+        return [s]
+
+    (rest, lower, upper) = ([], [], [])
+    for (row, rel) in zip(s.rows, s.rels):
+        if not row[j]:
+            rest.append((row, rel))
+        elif rel is Relation.EQ:
+            # An equation is the single test point needed.
+            return [s.eliminate(x)]
+        else:
+            (lower if row[j] < 0 else upper).append((row, rel))
+
+    if not lower or not upper:
+        # −∞ or +∞ satisfies all rows containing x.
+        return [System(s.variables, [row for (row, _) in rest], [rel for (_, rel) in rest])]
+
+    # Choose the smaller elimination set. Strict lower bounds are shifted by
+    # +ε, strict upper bounds by -ε.
+    (bounds, sign) = (lower, 1) if len(lower) <= len(upper) else (upper, -1)
+
+    result = []
+    seen: set[tuple[tuple[int, ...], bool]] = set()
+    for (bound, brel) in bounds:
+        key = (tuple(primitive(bound)), brel is Relation.LT)
+        if key in seen:
+            continue
+        seen.add(key)
+        ε = sign if brel is Relation.LT else 0
+        disjunct = list(rest)
+        for (row, rel) in lower + upper:
+            if row is bound:
+                # The bound is satisfied by its own test point.
+                continue
+            disjunct.append(substitute(row, rel, bound, j, ε))
+        result.append(System(s.variables, [row for (row, _) in disjunct], [rel for (_, rel) in disjunct]))
+    return result
@@ -29,7 +29,7 @@ from sympy import Integer, Symbol
 
 from ..abc.qe import QuantifierElimination as QuantifierEliminationBase
 from .rings import Atom, Simplifier as SimplifierBase
-from ..util import encode
+from ..util import atoms, encode
 
 
 class Simplifier(SimplifierBase):
@@ -49,17 +49,30 @@ class Simplifier(SimplifierBase):
 
 
 class QuantifierElimination(QuantifierEliminationBase[Symbol]):
-    def __init__(self, modulus: int):
-        super().__init__(Simplifier(modulus=modulus))
+    def __init__(self, modulus: int, **kwargs):
+        # Keyword arguments are passed on to the base class.
+        super().__init__(Simplifier(modulus=modulus), **kwargs)
         self.modulus = modulus
 
     def set_modulus(self, modulus: int):
+        # The new simplifier brings its own interner, which is shared as in
+        # __init__.
+        self.interner.clear()
         self.simplify = Simplifier(modulus=modulus)
+        self.interner = self.simplify.interner
         self.modulus = modulus
+        self.memo.clear()
 
     def qe1p(self, x: Symbol, f: Formula) -> Formula:
         return self.simplify(Or(*self.subs(x, f)))
 
+    def cost(self, x: Symbol, f: Formula) -> int:
+        # Estimates the size of the result of qe1p, which instantiates x with
+        # every residue. Atoms in x alone become ground and are evaluated by
+        # the simplifier, while atoms that contain further variables are
+        # copied once per residue.
+        return self.modulus * sum(1 for a in atoms(f) if x in a.get_vars().free and len(a.get_vars().free) > 1)
+
     def subs(self, x: Symbol, f: Formula) -> tuple[Formula]:
         return tuple(f.subs({x: i}) for i in range(self.modulus))
 
@@ -1,11 +1,12 @@
 import logging
-from typing import Any, Optional, TypeGuard, TypeVar, Iterator
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeGuard, TypeVar, Iterator
 
 from logic1.atomlib.sympy import Eq
 from logic1.firstorder import AtomicFormula, BooleanFormula
 from logic1.firstorder.formula import And, Formula, Not, Or
 from logic1.firstorder.boolean import AndOr
-from logic1.firstorder.quantified import QuantifiedFormula
+from logic1.firstorder.quantified import Ex, QuantifiedFormula
 from logic1.firstorder.truth import F, T, TruthValue
 from sympy import Expr
 
@@ -77,6 +78,42 @@ def closure(τ: type[QuantifiedFormula], φ: Formula, xs: Optional[set] = None)
     return φ
 
 
+def miniscope(φ: Formula) -> Formula:
+    """
+    Assumes that φ is in negation normal form.
+
+    Pushes quantifiers inward as far as possible: Ex is distributed over Or
+    and All over And, and arguments of And and Or that do not contain the
+    quantified variable are moved out of its scope.
+
+    >>> from sympy.abc import x, y
+    >>> φ = Ex(x, And(Eq(x, y), Eq(y, 0)))
+    >>> miniscope(φ) == And(Eq(y, 0), Ex(x, Eq(x, y)))
+    True
+    >>> miniscope(Ex(x, Or(Eq(x, y), Eq(y, 0)))) == Or(Ex(x, Eq(x, y)), Eq(y, 0))
+    True
+    """
+    if isinstance(φ, QuantifiedFormula):
+        (q, x) = (φ.func, φ.var)
+        ψ = miniscope(φ.arg)
+        if x not in ψ.get_vars().free:
+            return ψ
+        if isinstance(ψ, Or if q is Ex else And):
+            return ψ.func(*(miniscope(q(x, χ)) for χ in ψ.args))
+        if isinstance(ψ, AndOr):
+            (inner, outer) = ([], [])
+            for χ in ψ.args:
+                (inner if x in χ.get_vars().free else outer).append(χ)
+            if outer:
+                scope = inner[0] if len(inner) == 1 else ψ.func(*inner)
+                return ψ.func(*outer, miniscope(q(x, scope)))
+        return q(x, ψ)
+    elif isinstance(φ, AndOr):
+        return φ.func(*map(miniscope, φ.args))
+    else:
+        return φ
+
+
 def no_alternations(τ: type, φ: Formula) -> bool:
     """
     Assumes that φ is in prenex normal form.
@@ -165,6 +202,108 @@ def encode(x) -> TruthValue:
     return T if x else F
 
 
+def disjuncts(φ: Formula) -> Iterator[list[Formula]]:
+    """
+    Assumes that φ is in negation normal form.
+
+    Generates the disjuncts of a disjunctive normal form of φ as lists of
+    literals, one at a time. Nothing but the current path through φ is kept
+    in memory, at the price of walking conjunctions repeatedly.
+
+    >>> from sympy.abc import x
+    >>> [len(d) for d in disjuncts(And(Or(Eq(x, 0), Eq(x, 1)), Or(Eq(x, 2), F), T))]
+    [2, 2]
+    """
+    if φ is T:
+        yield []
+    elif φ is F:
+        return
+    elif isinstance(φ, Or):
+        for ψ in φ.args:
+            yield from disjuncts(ψ)
+    elif isinstance(φ, And):
+        yield from products(φ.args)
+    else:
+        yield [φ]
+
+
+def products(args: tuple[Formula, ...]) -> Iterator[list[Formula]]:
+    if not args:
+        yield []
+        return
+    for d in disjuncts(args[0]):
+        for e in products(args[1:]):
+            yield d + e
+
+
+def pack(φ: Formula) -> Any:
+    """
+    Returns a representation of the quantifier-free formula φ as nested
+    tuples of classes and atom arguments, which can be pickled, e.g. to send
+    φ to another process. Truth values are packed as bool, so that unpack
+    restores the singletons T and F.
+
+    >>> from sympy.abc import x
+    >>> φ = Or(Eq(x, 0), And(Eq(x, 1), T))
+    >>> unpack(pack(φ)) == φ
+    True
+    """
+    if isinstance(φ, TruthValue):
+        return φ is T
+    if isinstance(φ, AtomicFormula):
+        return (φ.func, φ.args)
+    if isinstance(φ, BooleanFormula):
+        return (φ.func, tuple(pack(ψ) for ψ in φ.args))
+    raise NotImplementedError("cannot pack " + str(type(φ)))
+
+
+def unpack(packed: Any) -> Formula:
+    """
+    Inverts pack.
+    """
+    if isinstance(packed, bool):
+        return encode(packed)
+    (func, args) = packed
+    if issubclass(func, AtomicFormula):
+        return func(*args)
+    return func(*(unpack(arg) for arg in args))
+
+
+class Memo(Generic[α]):
+    """
+    A cache of at most capacity entries, which evicts the least recently used
+    entry when it is full. A capacity of 0 disables caching.
+
+    >>> memo = Memo(2)
+    >>> [memo.lookup(k, lambda: k * k) for k in (1, 2, 1, 3, 2)]
+    [1, 4, 1, 9, 4]
+    >>> (memo.hits, memo.misses)
+    (1, 4)
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.entries: OrderedDict[Hashable, α] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Hashable, compute: Callable[[], α]) -> α:
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        value = compute()
+        if self.capacity > 0:
+            self.entries[key] = value
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
 def cmp(a, b) -> int:
     if a < b:
         return -1